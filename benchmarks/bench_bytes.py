@@ -0,0 +1,81 @@
+# bench_bytes.py
+# Throughput of the binary payload API (hide_bytes / extract_bytes) on
+# generated image and WAV carriers, in MB of payload per second.
+#
+#   python benchmarks/bench_bytes.py [--image-side 2048] [--seconds 120] [--fill 0.9]
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.audio_stego as audio_stego
+import categories.image_stego as image_stego
+from categories.carrier_cache import clear_cache
+
+def make_image(path, side):
+    rng = np.random.default_rng(0)
+    Image.fromarray(rng.integers(0, 256, (side, side, 3), dtype=np.uint8)).save(path, compress_level=1)
+
+def make_wav(path, seconds, rate=44100, channels=2):
+    rng = np.random.default_rng(1)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        for _ in range(seconds):
+            wf.writeframes(rng.integers(-8000, 8000, (rate, channels), dtype=np.int16).tobytes())
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def report(label, size, seconds):
+    print(f"{label:<34} {size / 1e6:8.2f} MB {seconds:8.3f} s {size / 1e6 / seconds:9.1f} MB/s")
+
+def run(name, module, carrier, output, fill, workdir, methods):
+    size = int(module.capacity(carrier, "LSB") * fill)
+    data = os.urandom(size)
+    source = os.path.join(workdir, "payload.bin")
+    with open(source, "wb") as f:
+        f.write(data)
+    for method in methods:
+        _, hide_s = timed(module.hide_bytes, carrier, data, output, method=method)
+        report(f"{name} {method} hide (bytes)", size, hide_s)
+        with open(source, "rb") as f:
+            _, hide_s = timed(module.hide_bytes, carrier, f, output, method=method)
+        report(f"{name} {method} hide (file)", size, hide_s)
+        clear_cache()
+        found, extract_s = timed(module.extract_bytes, output, method=method)
+        assert found == data
+        report(f"{name} {method} extract (bytes)", size, extract_s)
+        sink = io.BytesIO()
+        _, extract_s = timed(module.extract_bytes, output, method=method, sink=sink)
+        assert sink.getvalue() == data
+        report(f"{name} {method} extract (sink)", size, extract_s)
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary payload throughput benchmark")
+    parser.add_argument("--image-side", type=int, default=2048, help="Width and height of the image carrier")
+    parser.add_argument("--seconds", type=int, default=120, help="Length of the 44.1 kHz stereo WAV carrier")
+    parser.add_argument("--fill", type=float, default=0.9, help="Payload size as a share of LSB capacity")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        image = os.path.join(workdir, "carrier.png")
+        wav = os.path.join(workdir, "carrier.wav")
+        make_image(image, args.image_side)
+        make_wav(wav, args.seconds)
+        run("image", image_stego, image, os.path.join(workdir, "out.png"), args.fill, workdir,
+            ("LSB", "Parity", "BitPlane"))
+        run("audio", audio_stego, wav, os.path.join(workdir, "out.wav"), args.fill, workdir, ("LSB", "Parity"))
+
+if __name__ == "__main__":
+    main()
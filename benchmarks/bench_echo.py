@@ -0,0 +1,99 @@
+# bench_echo.py
+# Echo hiding: NumPy implementation vs the previous struct pack/unpack loop.
+# Both hide the same random alphanumeric payload: the framed codec with
+# compress=False, the legacy one NUL-terminated, and the legacy extractor
+# reads a carrier written by the legacy hide. (The legacy extractor stops at
+# any eight zero bits in a row, which characters such as '@' can produce.)
+#
+#   python benchmarks/bench_echo.py [--minutes 10] [--skip-legacy]
+import argparse
+import os
+import string
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.audio_stego as audio_stego
+
+MESSAGE = "".join(np.random.default_rng(0).choice(list(string.ascii_letters + string.digits), 184))
+
+def make_wav(path, minutes, channels=2, rate=44100):
+    rng = np.random.default_rng(0)
+    block = rate * 10
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        for _ in range(int(minutes * 6)):
+            wf.writeframes(rng.integers(-12000, 12000, (block, channels), dtype=np.int16).tobytes())
+
+# The implementation this module replaced, kept here only as a baseline
+def legacy_hide_echo(wav_path, message, output_path, delay_samples=120):
+    message += "\0"
+    bits = "".join(format(ord(c), "08b") for c in message)
+    with wave.open(wav_path, "rb") as wf:
+        params = wf.getparams()
+        frames = wf.readframes(wf.getnframes())
+    fmt = "<" + "h" * (len(frames) // 2)
+    samples = np.array(struct.unpack(fmt, frames), dtype=np.int16)
+    step = delay_samples + 2
+    for i, bit in enumerate(bits):
+        p = i * step
+        samples[p + delay_samples] = samples[p] if bit == "1" else -samples[p]
+    packed = struct.pack(fmt, *samples.tolist())
+    with wave.open(output_path, "wb") as wf:
+        wf.setparams(params)
+        wf.writeframes(packed)
+
+def legacy_extract_echo(wav_path, delay_samples=120):
+    with wave.open(wav_path, "rb") as wf:
+        frames = wf.readframes(wf.getnframes())
+    fmt = "<" + "h" * (len(frames) // 2)
+    samples = np.array(struct.unpack(fmt, frames), dtype=np.int16)
+    step = delay_samples + 2
+    bits = ""
+    for i in range(len(samples) // step):
+        a = int(samples[i * step])
+        b = int(samples[i * step + delay_samples])
+        bits += "1" if a and b and (a < 0) == (b < 0) else "0"
+        if len(bits) >= 8 and bits.endswith("00000000"):
+            break
+    return "".join(chr(int(bits[i:i + 8], 2)) for i in range(0, len(bits) - 8, 8))
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f} s")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Echo hiding benchmark")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        carrier = os.path.join(tmp, "carrier.wav")
+        out = os.path.join(tmp, "out.wav")
+        make_wav(carrier, args.minutes)
+        print(f"carrier: {args.minutes:g} min stereo 16-bit, {os.path.getsize(carrier) / 1e6:.1f} MB")
+
+        new_hide = timed("hide_audio_echo", audio_stego.hide_audio_echo, carrier, MESSAGE, out, compress=False)
+        new_extract = timed("extract_audio_echo", audio_stego.extract_audio_echo, out)
+        timed("hide_audio_echo_stream", audio_stego.hide_audio_echo_stream, carrier, MESSAGE, out, compress=False)
+        timed("extract_audio_echo_stream", audio_stego.extract_audio_echo_stream, out)
+        if args.skip_legacy:
+            return
+        old_hide = timed("legacy hide (struct)", legacy_hide_echo, carrier, MESSAGE, out)
+        old_extract = timed("legacy extract (struct)", legacy_extract_echo, out)
+        assert legacy_extract_echo(out) == MESSAGE
+        print(f"speedup: hide x{old_hide / new_hide:.1f}, extract x{old_extract / new_extract:.1f}")
+
+if __name__ == "__main__":
+    main()
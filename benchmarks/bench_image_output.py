@@ -0,0 +1,65 @@
+# bench_image_output.py
+# Write time and file size of the lossless image output options (PNG
+# compress_level / zlib strategy, uncompressed TIFF, BMP) for a stego image,
+# plus a full hide_lsb_image per option.
+#
+#   python benchmarks/bench_image_output.py [--megapixels 12] [--repeat 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.image_stego as image_stego
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import carriers
+
+# (label, output extension, save options)
+OPTIONS = [
+    ("png level 9", ".png", {"compress_level": 9}),
+    ("png level 6 (default)", ".png", {}),
+    ("png level 3", ".png", {"compress_level": 3}),
+    ("png level 1", ".png", {"compress_level": 1}),
+    ("png level 1 rle", ".png", {"compress_level": 1, "compress_type": zlib.Z_RLE}),
+    ("png level 1 huffman", ".png", {"compress_level": 1, "compress_type": zlib.Z_HUFFMAN_ONLY}),
+    ("png level 0", ".png", {"compress_level": 0}),
+    ("tiff (raw)", ".tif", {}),
+    ("bmp", ".bmp", {}),
+]
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Image output format benchmark")
+    parser.add_argument("--megapixels", type=float, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    carrier = carriers.png(args.megapixels)
+    pixels = image_stego._load_pixels(carrier)
+    message = "benchmark " * 1000
+    print(f"{pixels.shape[1]}x{pixels.shape[0]} carrier, best of {args.repeat}")
+    print(f"{'output':<22} {'write s':>8} {'size MB':>8} {'hide s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, ext, save in OPTIONS:
+            output = os.path.join(workdir, "out" + ext)
+            options = image_stego.save_options(output, **save)
+            write_s = best_of(args.repeat, lambda: Image.fromarray(pixels).save(output, **options))
+            size = os.path.getsize(output)
+            hide_s = best_of(args.repeat, lambda: image_stego.hide_lsb_image(carrier, message, output, **save))
+            assert image_stego.extract_lsb_image(output) == message
+            print(f"{label:<22} {write_s:8.3f} {size / 1e6:8.2f} {hide_s:8.3f}")
+
+if __name__ == "__main__":
+    main()
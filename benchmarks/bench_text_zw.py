@@ -0,0 +1,87 @@
+# bench_text_zw.py
+# Zero-width text embedding across cover sizes, against the previous
+# list.insert implementation (which is O(cover * payload)). Both sides hide
+# the same random alphanumeric payload: the framed codec with compress=False,
+# the legacy one NUL-terminated, and the legacy extractor reads a carrier
+# written by the legacy hide.
+#
+#   python benchmarks/bench_text_zw.py [--sizes 10K,100K,1M,10M,100M] [--payload 1K] [--legacy-max 1M]
+import argparse
+import os
+import sys
+import string
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.text_stego as text_stego
+
+def parse_size(text):
+    units = {"K": 1000, "M": 1000 ** 2, "G": 1000 ** 3}
+    text = text.strip().upper()
+    return int(float(text[:-1]) * units[text[-1]]) if text[-1] in units else int(text)
+
+def make_message(size):
+    return "".join(np.random.default_rng(size).choice(list(string.ascii_letters + string.digits), size))
+
+def make_cover(size):
+    line = "the quick brown fox jumps over the lazy dog while the cover text keeps growing\n"
+    return (line * (size // len(line) + 1))[:size]
+
+# The implementations this module replaced, kept here only as a baseline
+def legacy_hide_zw(cover_text, message):
+    message += "\0"
+    bits = ''.join(format(ord(c), '08b') for c in message)
+    result = list(cover_text)
+    insert_pos = 0
+    for bit in bits:
+        while insert_pos < len(result) and result[insert_pos] == ' ':
+            insert_pos += 1
+        if insert_pos >= len(result):
+            raise ValueError("Cover text too short")
+        result.insert(insert_pos + 1, text_stego.ZWSP if bit == '1' else text_stego.ZWNJ)
+        insert_pos += 2
+    return ''.join(result)
+
+def legacy_extract_zw(text):
+    bits = []
+    for ch in text:
+        if ch == text_stego.ZWSP:
+            bits.append('1')
+        elif ch == text_stego.ZWNJ:
+            bits.append('0')
+        if len(bits) % 8 == 0 and len(bits) > 0 and bits[-8:] == ['0'] * 8:
+            return ''.join(chr(int(''.join(bits[i:i + 8]), 2)) for i in range(0, len(bits) - 8, 8))
+    return ''
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Zero-width text embedding benchmark")
+    parser.add_argument("--sizes", default="10K,100K,1M,10M,100M")
+    parser.add_argument("--payload", default="1K")
+    parser.add_argument("--legacy-max", default="1M", help="Largest cover to run the legacy code on")
+    args = parser.parse_args()
+
+    message = make_message(parse_size(args.payload))
+    legacy_max = parse_size(args.legacy_max)
+    print(f"{'cover':>10} {'hide s':>9} {'extract s':>10} {'legacy hide s':>14} {'legacy extract s':>17}")
+    for size in (parse_size(s) for s in args.sizes.split(",")):
+        cover = make_cover(size)
+        hidden, hide_s = timed(lambda: text_stego.hide_zw(cover, message, compress=False))
+        found, extract_s = timed(text_stego.extract_zw, hidden)
+        assert found == message
+        legacy = ("-", "-")
+        if size <= legacy_max:
+            legacy_hidden, old_hide = timed(legacy_hide_zw, cover, message)
+            found, old_extract = timed(legacy_extract_zw, legacy_hidden)
+            assert found == message
+            legacy = (f"{old_hide:.3f}", f"{old_extract:.3f}")
+        print(f"{size:>10} {hide_s:9.3f} {extract_s:10.3f} {legacy[0]:>14} {legacy[1]:>17}")
+
+if __name__ == "__main__":
+    main()
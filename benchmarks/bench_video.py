@@ -0,0 +1,50 @@
+# bench_video.py
+# Frame-LSB video embedding through the read -> embed -> write pipeline,
+# across worker counts, on a generated .y4m carrier.
+#
+#   python benchmarks/bench_video.py [--size 1280x720] [--frames 300] [--workers 1,2,4,8] [--fill 0.5]
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.video_stego as video_stego
+
+def make_y4m(path, width, height, frames):
+    rng = np.random.default_rng(0)
+    frame_size = video_stego._frame_size(width, height, "420jpeg")
+    with open(path, "wb") as f:
+        f.write(b"YUV4MPEG2 W%d H%d F30:1 Ip A1:1 C420jpeg\n" % (width, height))
+        frame = rng.integers(0, 256, frame_size, dtype=np.uint8).tobytes()
+        for _ in range(frames):
+            f.write(video_stego.FRAME_TAG)
+            f.write(frame)
+
+def main():
+    parser = argparse.ArgumentParser(description="Video pipeline benchmark")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--fill", type=float, default=0.5, help="Payload size as a share of capacity")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    with tempfile.TemporaryDirectory() as workdir:
+        carrier = os.path.join(workdir, "carrier.y4m")
+        output = os.path.join(workdir, "out.y4m")
+        make_y4m(carrier, width, height, args.frames)
+        data = os.urandom(int(video_stego.capacity(carrier) * args.fill))
+        print(f"{args.frames} frames {width}x{height}, payload {len(data) / 1e6:.1f} MB")
+        print(f"{'workers':>7} {'fps':>8} {'total s':>8} {'read s':>7} {'embed s':>8} {'write s':>8}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            stats = {}
+            video_stego.hide_bytes(carrier, data, output, workers=workers, stats=stats)
+            print(f"{workers:>7} {stats['frames_per_second']:8.1f} {stats['seconds']:8.3f} {stats['read_seconds']:7.3f} "
+                  f"{stats['embed_seconds']:8.3f} {stats['write_seconds']:8.3f}")
+        assert video_stego.extract_bytes(output) == data
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# carriers.py
+# Deterministic synthetic carriers for the benchmarks. Files are cached in a
+# directory by their parameters, so repeated runs (and runs of different
+# versions being compared) use byte-identical inputs.
+import os
+import wave
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".carriers")
+
+TEXT_LINE = "the quick brown fox jumps over the lazy dog while the cover text keeps growing\n"
+
+def _cached(directory, name, build):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        build(tmp)
+        os.replace(tmp, path)
+    return path
+
+def png(megapixels, directory=DEFAULT_DIR):
+    """Noisy RGB gradient PNG of about `megapixels` MP (4:3)."""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+
+    def build(path):
+        rng = np.random.default_rng(0)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None, None]
+        x = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+        base = (y * 0.6 + x * 0.4) * np.array([1.0, 0.8, 0.6], dtype=np.float32)
+        noise = rng.integers(0, 16, (height, width, 3), dtype=np.uint8)
+        Image.fromarray((base.astype(np.uint8) // 2 + noise).astype(np.uint8)).save(path, format="PNG", compress_level=1)
+
+    return _cached(directory, f"image_{megapixels:g}mp.png", build)
+
+def wav(seconds, channels=1, rate=44100, directory=DEFAULT_DIR):
+    """16-bit PCM tone plus noise, written in one-second blocks."""
+    def build(path):
+        rng = np.random.default_rng(1)
+        t = np.arange(rate) / rate
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            for second in range(int(seconds)):
+                tone = 8000 * np.sin(2 * np.pi * (220 + second % 50) * t)
+                block = tone[:, None] + rng.normal(0, 400, (rate, channels))
+                wf.writeframes(np.clip(block, -32768, 32767).astype("<i2").tobytes())
+
+    return _cached(directory, f"audio_{seconds:g}s_{channels}ch.wav", build)
+
+def text(size, directory=DEFAULT_DIR):
+    """Plain prose-like cover of `size` characters."""
+    def build(path):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            chunk = TEXT_LINE * 10000
+            remaining = size
+            while remaining > 0:
+                piece = chunk[:remaining]
+                f.write(piece)
+                remaining -= len(piece)
+
+    return _cached(directory, f"text_{size}.txt", build)
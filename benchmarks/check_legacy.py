@@ -0,0 +1,81 @@
+# check_legacy.py
+# Reads carriers written in the byte-wise audio layouts that predate
+# sample-aware embedding (the original 32-bit length prefix, and payload
+# frames over every byte) with the current extractors. Exits non-zero if any
+# message does not come back exactly.
+#
+#   python benchmarks/check_legacy.py [--seconds 10]
+import argparse
+import os
+import sys
+import tempfile
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import categories.audio_stego as audio_stego
+from categories import payload
+from categories.carrier_cache import clear_cache
+
+MESSAGES = ["Hello", "short", "tracking-id-0001", "a", "ünïcödé", "x" * 300, "line one\nline two", "0"]
+
+def make_wav(path, seconds, channels, rate=44100):
+    rng = np.random.default_rng(channels)
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(rng.integers(-8000, 8000, (seconds * rate, channels), dtype=np.int16).tobytes())
+
+# The layouts earlier releases wrote: one bit in every byte of the frames
+def legacy_length_prefixed(message):
+    data = message.encode("utf-8")
+    return len(data).to_bytes(payload.LEGACY_HEADER_SIZE, "big") + data
+
+def legacy_framed(message):
+    return payload.pack(message.encode("utf-8"))
+
+def legacy_hide(wav_path, data, output_path, parity):
+    with wave.open(wav_path, "rb") as wf:
+        params = wf.getparams()
+        samples = bytearray(wf.readframes(wf.getnframes()))
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    if len(bits) > len(samples):
+        raise ValueError("Message too long for audio")
+    for i, bit in enumerate(bits):
+        current = bin(samples[i]).count("1") % 2 if parity else samples[i] & 1
+        if current != bit:
+            samples[i] ^= 1
+    with wave.open(output_path, "wb") as wf:
+        wf.setparams(params)
+        wf.writeframes(bytes(samples))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=int, default=10)
+    args = parser.parse_args()
+
+    methods = [("lsb", False, audio_stego.extract_audio_lsb), ("parity", True, audio_stego.extract_audio_parity)]
+    layouts = [("length-prefixed", legacy_length_prefixed), ("framed", legacy_framed)]
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for channels in (1, 2):
+            carrier = os.path.join(tmp, f"carrier-{channels}ch.wav")
+            make_wav(carrier, args.seconds, channels)
+            for name, parity, extract in methods:
+                for layout, encode in layouts:
+                    for index, message in enumerate(MESSAGES):
+                        output = os.path.join(tmp, f"{name}-{layout}-{channels}ch-{index}.wav")
+                        legacy_hide(carrier, encode(message), output, parity)
+                        clear_cache()
+                        result = extract(output)
+                        if result != message:
+                            failures += 1
+                            print(f"FAIL {name:6} {layout:15} {channels}ch {message[:20]!r} -> {result[:20]!r}")
+    total = 2 * len(methods) * len(layouts) * len(MESSAGES)
+    print(f"{total - failures}/{total} legacy carriers read back")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+# suite.py
+# Times and memory-profiles every registered Image, Audio and Text method
+# (through the method registry, as the GUI and batch runner call them) and
+# every other hide_*/extract_* function of image_stego, audio_stego and
+# text_stego on synthetic carriers, measures the cold import
+# time of the entry points, and writes the results to JSON. --compare diffs
+# against an earlier JSON and exits non-zero on a regression.
+#
+#   python benchmarks/suite.py [--preset quick|full] [--only REGEX] [--output results.json]
+#   python benchmarks/suite.py --compare baseline.json [--threshold 0.10]
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import categories.audio_stego as audio_stego
+import categories.image_stego as image_stego
+import categories.text_stego as text_stego
+from categories import registry
+from categories.carrier_cache import clear_cache
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import carriers
+
+# Carrier sizes per preset: PNG megapixels, WAV (seconds, channels), text characters
+PRESETS = {
+    "quick": {"png": [1], "wav": [(10, 1), (10, 2)], "text": [10_000, 1_000_000]},
+    "full": {"png": [1, 12, 50], "wav": [(10, 1), (60, 2), (3600, 2)], "text": [1_000, 1_000_000, 100_000_000]},
+}
+
+# ----------------- Cases -----------------
+# Each method is a hide/extract pair. hide(carrier, message, output, compress)
+# and extract(output) wrap the module functions; the last element lists the functions a
+# case exercises so uncovered ones can be reported. The unqualified case of a
+# method goes through its registry entry with default parameters (and so its
+# preferred backend); variants call the other implementations directly.
+KINDS = {"png": "Image", "wav": "Audio", "text": "Text"}
+MODULES = {"png": image_stego, "wav": audio_stego, "text": text_stego}
+
+def _registered(kind, method):
+    params = method.default_params()
+
+    def hide(carrier, message, output, compress=True):
+        method.hide(carrier, message, output, compress=compress, **params)
+
+    def extract(output):
+        return method.extract(output, **params)
+    covered = [getattr(MODULES[kind], name) for name in method.function_names()]
+    return kind, method.name, params, hide, extract, covered
+
+def _text_stream(fn):
+    def hide(carrier, message, output, compress=True):
+        with open(carrier, "r", encoding="utf-8") as src, open(output, "w", encoding="utf-8") as dst:
+            fn(src, dst, message, compress=compress)
+    return hide
+
+def _read_text(fn):
+    def call(path, *args, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            return fn(f.read(), *args, **kwargs)
+    return call
+
+def _open_text(fn):
+    def call(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return fn(f)
+    return call
+
+def _hide_text(fn):
+    def hide(carrier, message, output, compress=True):
+        result = _read_text(fn)(carrier, message, compress=compress)
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(result)
+    return hide
+
+def _binary(module, **params):
+    # hide_bytes frames are never compressed
+    def hide(carrier, message, output, compress=True):
+        module.hide_bytes(carrier, message.encode("utf-8"), output, **params)
+
+    def extract(output):
+        data = module.extract_bytes(output, **params)
+        return None if data is None else data.decode("utf-8")
+    return hide, extract
+
+def _cases():
+    img, aud, txt = image_stego, audio_stego, text_stego
+    cases = [_registered(kind, method) for kind, category in KINDS.items() for method in registry.methods(category)]
+    cases += [
+        ("png", "LSB", {"bytes": True}, *_binary(img), [img.hide_bytes, img.extract_bytes]),
+        ("wav", "LSB", {"whole": True}, aud.hide_audio_lsb, aud.extract_audio_lsb,
+         [aud.hide_audio_lsb, aud.extract_audio_lsb]),
+        ("wav", "kLSB", {"k": 2, "whole": True},
+         lambda c, m, o, compress=True: aud.hide_audio_klsb(c, m, o, k=2, compress=compress),
+         lambda o: aud.extract_audio_klsb(o, k=2), [aud.hide_audio_klsb, aud.extract_audio_klsb]),
+        ("wav", "Parity", {"whole": True}, aud.hide_audio_parity, aud.extract_audio_parity,
+         [aud.hide_audio_parity, aud.extract_audio_parity]),
+        ("wav", "LSB", {"stream": True}, aud.hide_audio_lsb_stream, aud.extract_audio_lsb_stream,
+         [aud.hide_audio_lsb_stream, aud.extract_audio_lsb_stream]),
+        ("wav", "Parity", {"stream": True}, aud.hide_audio_parity_stream, aud.extract_audio_parity_stream,
+         [aud.hide_audio_parity_stream, aud.extract_audio_parity_stream]),
+        ("wav", "LSB", {"bytes": True}, *_binary(aud), [aud.hide_bytes, aud.extract_bytes]),
+        ("wav", "Echo", {"whole": True}, aud.hide_audio_echo, aud.extract_audio_echo,
+         [aud.hide_audio_echo, aud.extract_audio_echo]),
+        ("text", "ZW", {"str": True}, _hide_text(txt.hide_zw), _read_text(txt.extract_zw), [txt.hide_zw]),
+        ("text", "Parity", {"str": True}, _hide_text(txt.hide_parity_text), _read_text(txt.extract_parity_text),
+         [txt.hide_parity_text]),
+        ("text", "Whitespace", {"str": True}, _hide_text(txt.hide_whitespace), _read_text(txt.extract_whitespace),
+         [txt.hide_whitespace]),
+        ("text", "ZW", {"stream": True}, _text_stream(txt.hide_zw_stream), _open_text(txt.extract_zw_stream),
+         [txt.hide_zw_stream, txt.extract_zw_stream]),
+        ("text", "Parity", {"stream": True}, _text_stream(txt.hide_parity_text_stream),
+         _open_text(txt.extract_parity_text_stream), [txt.hide_parity_text_stream, txt.extract_parity_text_stream]),
+        ("text", "Whitespace", {"stream": True}, _text_stream(txt.hide_whitespace_stream),
+         _open_text(txt.extract_whitespace_stream), [txt.hide_whitespace_stream, txt.extract_whitespace_stream]),
+    ]
+    return cases
+
+def uncovered(cases):
+    """Public hide_*/extract_* functions that no case exercises."""
+    covered = {id(fn) for case in cases for fn in case[5]}
+    missing = []
+    for module in (image_stego, audio_stego, text_stego):
+        for name in sorted(vars(module)):
+            fn = getattr(module, name)
+            if (re.match(r"(iter_)?(hide|extract)_", name) and callable(fn)
+                    and getattr(fn, "__module__", None) == module.__name__ and id(fn) not in covered):
+                missing.append(f"{module.__name__.split('.')[-1]}.{name}")
+    return missing
+
+# ----------------- Measuring -----------------
+def measure(fn, repeat):
+    """(best seconds, mean seconds, tracemalloc peak bytes, result); the peak comes from one extra traced run."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        clear_cache()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    clear_cache()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), sum(times) / len(times), peak, result
+
+def _carriers(preset, directory):
+    for mp in preset["png"]:
+        yield "png", f"png-{mp:g}MP", carriers.png(mp, directory)
+    for seconds, channels in preset["wav"]:
+        yield "wav", f"wav-{seconds:g}s-{channels}ch", carriers.wav(seconds, channels, directory=directory)
+    for size in preset["text"]:
+        yield "text", f"text-{size}", carriers.text(size, directory)
+
+def _capacity(kind, carrier, method, params):
+    method = registry.get(KINDS[kind], method)
+    return method.capacity(carrier, **{k: v for k, v in params.items() if k in method.default_params()})
+
+def run_suite(preset, only=None, repeat=3, payload_limit=64 * 1024, carrier_dir=carriers.DEFAULT_DIR, log=print):
+    cases = _cases()
+    results = []
+    pattern = re.compile(only) if only else None
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind, carrier_name, carrier in _carriers(preset, carrier_dir):
+            for case_kind, method, params, hide, extract, _ in cases:
+                if case_kind != kind:
+                    continue
+                variant = "+".join(k if v is True else f"{k}={v}" for k, v in params.items())
+                name = f"{kind}/{method}" + (f"[{variant}]" if variant else "")
+                if pattern and not pattern.search(f"{name} {carrier_name}"):
+                    continue
+                size = min(payload_limit, int(_capacity(kind, carrier, method, params) * 0.9))
+                if size <= 0:
+                    log(f"skip {name} on {carrier_name}: no capacity")
+                    continue
+                # Random printable ASCII still compresses by about 17%, so it is
+                # hidden uncompressed: the frame body is exactly size bytes
+                message = np.random.default_rng(size).integers(33, 127, size, dtype=np.uint8).tobytes().decode("ascii")
+                output = os.path.join(workdir, "out" + os.path.splitext(carrier)[1])
+                for operation, fn in (("hide", lambda: hide(carrier, message, output, compress=False)),
+                                      ("extract", lambda: extract(output))):
+                    try:
+                        best, mean, peak, result = measure(fn, repeat)
+                    except Exception as e:
+                        log(f"FAILED {name} {operation} on {carrier_name}: {type(e).__name__}: {e}")
+                        results.append({"case": f"{name}/{operation}", "carrier": carrier_name,
+                                        "error": f"{type(e).__name__}: {e}"})
+                        break
+                    if operation == "extract" and result != message:
+                        log(f"MISMATCH {name} on {carrier_name}: extracted payload differs")
+                    entry = {"case": f"{name}/{operation}", "carrier": carrier_name, "payload_bytes": size,
+                             "carrier_bytes": os.path.getsize(carrier), "seconds": best, "mean_seconds": mean,
+                             "peak_bytes": peak, "ok": operation == "hide" or result == message}
+                    results.append(entry)
+                    log(f"{entry['case']:<36} {carrier_name:<18} {best:9.4f} s {peak / 2**20:9.1f} MiB")
+    return results, uncovered(cases)
+
+# ----------------- Import time -----------------
+# `python -X importtime -c "import <module>"` in a fresh interpreter per
+# run; the figure is the cumulative time of the top-level imports that
+# interpreter startup does not already do. Heavy dependencies an entry point
+# pulls in are recorded too: headless tools must never load Tk, and text
+# codecs must not load NumPy.
+IMPORT_TARGETS = ["stego_cli", "stego_batch", "categories.registry", "categories.text_stego",
+                  "categories.image_stego", "categories.audio_stego", "categories.video_stego", "steganography_app"]
+HEAVY_MODULES = ("numpy", "PIL", "tkinter", "customtkinter")
+
+def _importtime(code):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=ROOT)
+    top = {}
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        # Nested imports are indented below the one that triggered them
+        if len(parts) == 3 and parts[2].startswith(" ") and not parts[2][1:].startswith(" "):
+            try:
+                top[parts[2].strip()] = int(parts[1])
+            except ValueError:
+                pass
+    return proc, top
+
+def import_time(module, repeat=3):
+    """(best microseconds, heavy modules loaded, error) for importing module in fresh interpreters."""
+    _, startup = _importtime("pass")
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    best = None
+    for _ in range(repeat):
+        proc, top = _importtime(code)
+        if proc.returncode:
+            return None, [], proc.stderr.strip().splitlines()[-1]
+        total = sum(us for name, us in top.items() if name not in startup)
+        best = total if best is None else min(best, total)
+    return best, proc.stdout.split(), None
+
+def run_imports(only=None, repeat=3, log=print):
+    results = []
+    pattern = re.compile(only) if only else None
+    for module in IMPORT_TARGETS:
+        if pattern and not pattern.search(f"import/{module}"):
+            continue
+        micros, heavy, error = import_time(module, repeat)
+        if error:
+            # e.g. the GUI without customtkinter installed
+            log(f"skip import/{module}: {error}")
+            results.append({"module": module, "error": error})
+            continue
+        results.append({"module": module, "seconds": micros / 1e6, "loads": heavy})
+        log(f"{'import/' + module:<36} {'':<18} {micros / 1e6:9.4f} s   loads {', '.join(heavy) or '-'}")
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+# ----------------- Comparison -----------------
+def compare(baseline, current, threshold, log=print):
+    """Print time/peak ratios for entries present in both runs; returns the regressed entries."""
+    base = {(r["case"], r["carrier"]): r for r in baseline["results"] if "seconds" in r}
+    regressions = []
+    log(f"{'case':<36} {'carrier':<18} {'base s':>9} {'new s':>9} {'time':>7} {'peak':>7}")
+    for entry in current["results"]:
+        old = base.get((entry["case"], entry["carrier"]))
+        if old is None or "seconds" not in entry:
+            continue
+        time_ratio = entry["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        peak_ratio = entry["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flag = ""
+        if time_ratio > 1 + threshold or peak_ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(entry)
+        log(f"{entry['case']:<36} {entry['carrier']:<18} {old['seconds']:9.4f} {entry['seconds']:9.4f} "
+            f"{time_ratio:6.2f}x {peak_ratio:6.2f}x{flag}")
+    base_imports = {r["module"]: r for r in baseline.get("imports", []) if "seconds" in r}
+    for entry in current.get("imports", []):
+        old = base_imports.get(entry["module"])
+        if old is None or "seconds" not in entry:
+            continue
+        time_ratio = entry["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        # A heavy dependency that an entry point did not load before is a regression
+        # whatever the timing
+        new_loads = sorted(set(entry["loads"]) - set(old["loads"]))
+        flag = ""
+        if time_ratio > 1 + threshold or new_loads:
+            flag = "  REGRESSION" + (f" (now loads {', '.join(new_loads)})" if new_loads else "")
+            regressions.append(entry)
+        log(f"{'import/' + entry['module']:<36} {'':<18} {old['seconds']:9.4f} {entry['seconds']:9.4f} "
+            f"{time_ratio:6.2f}x {'':>7}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Steganography benchmark suite")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--only", help="Regex on '<category>/<method>[variant] <carrier>'")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is reported)")
+    parser.add_argument("--payload", type=int, default=64 * 1024, help="Payload size limit in bytes")
+    parser.add_argument("--carrier-dir", default=carriers.DEFAULT_DIR, help="Where generated carriers are cached")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    results, missing = run_suite(PRESETS[args.preset], args.only, args.repeat, args.payload, args.carrier_dir)
+    # Imports take milliseconds and vary more between runs, so they always get a few extra
+    imports = run_imports(args.only, max(args.repeat, 5))
+    report = {
+        "meta": {
+            "preset": args.preset,
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "imports": imports,
+        "uncovered": missing,
+    }
+    if missing:
+        print("Not benchmarked: " + ", ".join(missing))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    failed = [r for r in results if not r.get("ok")]
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
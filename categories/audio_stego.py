@@ -1,267 +1,604 @@
 # audio_stego.py
+import itertools
 import wave
 import os
-import struct
+import shutil
 import numpy as np
 
-# Utilities
-def build_binary_with_header(message):
-    length = len(message.encode('utf-8'))
-    header = format(length, '032b')
-    payload = ''.join(format(b, '08b') for b in message.encode('utf-8'))
-    return header + payload
-
-def bits_to_message_by_length(bits, byte_length):
-    needed = byte_length * 8
-    if len(bits) < needed:
-        return None
-    message = ''
-    for i in range(0, needed, 8):
-        byte = bits[i:i+8]
-        message += chr(int(byte, 2))
-    try:
-        return bytes([ord(c) for c in message]).decode('utf-8', errors='replace')
-    except Exception:
-        return message
-
-# ---------------- LSB ----------------
-def hide_audio_lsb(wav_path, message, output_path):
+from categories.bitcodec import (message_to_bytes, message_to_bits, embed_plane, embed_parity, embed_klsb,
+                                 embed_frame, check_k, read_plane, read_parity, read_klsb, element_reader,
+                                 decode_message, extract_payload, byte_reader, scan_carrier)
+from categories.carrier_cache import load_wav, cached_wav
+from categories import payload
+from categories.trace import span
+
+STREAM_BLOCK_FRAMES = 1 << 16
+COPY_BLOCK_FRAMES = 1 << 20
+
+def _read_data_bytes(wf, start, count):
+    """Read `count` bytes of the data chunk starting at byte `start`, touching only the frames that hold them."""
+    frame_size = wf.getsampwidth() * wf.getnchannels()
+    first = start // frame_size
+    last = -(-(start + count) // frame_size)
+    wf.setpos(first)
+    data = np.frombuffer(wf.readframes(last - first), dtype=np.uint8)
+    offset = start - first * frame_size
+    return data[offset:offset + count]
+
+def _data_size(wf):
+    return wf.getnframes() * wf.getsampwidth() * wf.getnchannels()
+
+# LSB, k-LSB and parity only touch the low-order byte of each sample (PCM
+# is little-endian), taken as a strided view of the frame bytes, so a 16 or
+# 24-bit sample changes by at most 2**k - 1 and never in its high bytes.
+# Every sample of every channel carries payload bits, in frame order.
+def _sample_count(wf):
+    return wf.getnframes() * wf.getnchannels()
+
+def _read_low_bytes(wf, start, count, stride=None):
+    """Low-order bytes of samples [start, start + count), across all channels."""
+    stride = stride or wf.getsampwidth()
+    return _read_data_bytes(wf, start * stride, count * stride)[::stride]
+
+def _hide_whole(wav_path, message, output_path, embed, progress=None, k=1, compress=True):
     if not os.path.exists(wav_path):
         raise FileNotFoundError("WAV file not found")
-    bits = build_binary_with_header(message)
-    with wave.open(wav_path, 'rb') as wf:
-        params = wf.getparams()
-        frames = wf.readframes(wf.getnframes())
-    samples = bytearray(frames)
-    if len(bits) > len(samples):
+    with span("encode"):
+        bits = message_to_bits(message, compress)
+    with span("load", path=wav_path):
+        with wave.open(wav_path, 'rb') as wf:
+            params = wf.getparams()
+            samples = bytearray(wf.readframes(wf.getnframes()))
+    low = np.frombuffer(samples, dtype=np.uint8)[::params.sampwidth]
+    if bits.size > low.size * k:
         raise ValueError('Message too long for audio')
-    for i, bit in enumerate(bits):
-        samples[i] = (samples[i] & 0xFE) | int(bit)
-    with wave.open(output_path, 'wb') as wf:
-        wf.setparams(params)
-        wf.writeframes(bytes(samples))
+    if progress:
+        progress(0.4)
+    with span("embed", bits=bits.size):
+        embed(low, bits)
+    if progress:
+        progress(0.6)
+    with span("write", path=output_path):
+        with wave.open(output_path, 'wb') as wf:
+            wf.setparams(params)
+            wf.writeframes(samples)
+    if progress:
+        progress(1.0)
     return output_path
 
-def extract_audio_lsb(wav_path):
+def _extract_bytes(wav_path, read_bits, progress=None, k=1):
     if not os.path.exists(wav_path):
         raise FileNotFoundError("WAV file not found")
+    cached = cached_wav(wav_path)
     with wave.open(wav_path, 'rb') as wf:
-        params = wf.getparams()
-        frames = wf.readframes(wf.getnframes())
-    samples = bytearray(frames)
-    bits = ''.join(str(samples[i] & 1) for i in range(len(samples)))
-    if len(bits) < 32:
-        return ''
-    length = int(bits[:32], 2)
-    total = 32 + length * 8
-    if len(bits) < total:
-        return ''
-    message_bits = bits[32:32 + length * 8]
-    return bits_to_message_by_length(message_bits, length)
+        sampwidth = wf.getsampwidth()
+        # Carriers written before sample-aware embedding used every byte. Any
+        # bits pass as a legacy length, so the sample layout only counts a
+        # valid frame; the legacy length prefix is only tried byte-wise.
+        for stride in dict.fromkeys((sampwidth, 1)):
+            if cached is not None:
+                data = cached[1][::stride]
+                fetch = lambda start, count: data[start:start + count]
+            else:
+                # Not worth caching: only the header and payload frames are read
+                fetch = lambda start, count: _read_low_bytes(wf, start, count, stride)
+            with span("decode", stride=stride):
+                message = decode_message(element_reader(fetch, read_bits, k), _data_size(wf) // stride * k,
+                                         legacy=stride == 1)
+            if message:
+                break
+    if progress:
+        progress(1.0)
+    return message
 
-# ---------------- Parity ----------------
-def hide_audio_parity(wav_path, message, output_path):
-    if not os.path.exists(wav_path):
-        raise FileNotFoundError("WAV file not found")
-    bits = build_binary_with_header(message)
-    with wave.open(wav_path, 'rb') as wf:
-        params = wf.getparams()
-        frames = wf.readframes(wf.getnframes())
-    samples = bytearray(frames)
-    if len(bits) > len(samples):
-        raise ValueError('Message too long')
-    for i, bit in enumerate(bits):
-        parity = bin(samples[i]).count('1') % 2
-        if parity != int(bit):
-            samples[i] ^= 1
-    with wave.open(output_path, 'wb') as wf:
-        wf.setparams(params)
-        wf.writeframes(bytes(samples))
-    return output_path
+# ---------------- LSB ----------------
+def hide_audio_lsb(wav_path, message, output_path, progress=None, compress=True):
+    return _hide_whole(wav_path, message, output_path, lambda data, bits: embed_plane(data, bits, 0), progress,
+                       compress=compress)
 
-def extract_audio_parity(wav_path):
-    if not os.path.exists(wav_path):
-        raise FileNotFoundError("WAV file not found")
-    with wave.open(wav_path, 'rb') as wf:
-        frames = wf.readframes(wf.getnframes())
-    samples = bytearray(frames)
-    bits = ''.join(str(bin(s).count('1') % 2) for s in samples)
-    if len(bits) < 32:
-        return ''
-    length = int(bits[:32], 2)
-    total = 32 + length * 8
-    if len(bits) < total:
-        return ''
-    message_bits = bits[32:32 + length * 8]
-    return bits_to_message_by_length(message_bits, length)
-
-# ---------------- Phase (mono 16-bit support) ----------------
-def hide_audio_phase(wav_path, message, output_path):
+def extract_audio_lsb(wav_path, progress=None):
+    return _extract_bytes(wav_path, lambda values: read_plane(values, 0), progress)
+
+# ---------------- Parity ----------------
+def hide_audio_parity(wav_path, message, output_path, progress=None, compress=True):
+    return _hide_whole(wav_path, message, output_path, embed_parity, progress, compress=compress)
+
+def extract_audio_parity(wav_path, progress=None):
+    return _extract_bytes(wav_path, read_parity, progress)
+
+# ---------------- k-LSB ----------------
+# k (1-4) low bits of every sample: k times fewer samples touched than LSB.
+def hide_audio_klsb(wav_path, message, output_path, k=2, progress=None, compress=True):
+    check_k(k)
+    return _hide_whole(wav_path, message, output_path, lambda data, bits: embed_klsb(data, bits, k), progress, k,
+                       compress)
+
+def extract_audio_klsb(wav_path, k=2, progress=None):
+    check_k(k)
+    return _extract_bytes(wav_path, lambda values: read_klsb(values, k), progress, k)
+
+# ---------------- Phase (segmented, 16-bit) ----------------
+# The first channel is cut into PHASE_SEGMENT-frame segments. Each payload
+# segment gets an rfft (float32) and the phases of its lowest PHASE_BITS
+# bins (DC excluded) are set to 0 for a 0 bit or pi/2 for a 1 bit; the
+# magnitudes and every other channel are left untouched. Segments after the
+# payload are copied through, and extraction stops after the header-declared
+# length.
+PHASE_SEGMENT = 4096
+PHASE_BITS = PHASE_SEGMENT // 8
+
+def _phase_open(wav_path):
     if not os.path.exists(wav_path):
         raise FileNotFoundError("WAV file not found")
-    bits = build_binary_with_header(message)
     try:
-        with wave.open(wav_path, 'rb') as wav:
-            params = wav.getparams()
-            n_channels, sampwidth, framerate, n_frames, comptype, compname = params
-            frames = wav.readframes(n_frames)
-            if sampwidth != 2:
-                raise ValueError("Only 16-bit PCM WAV supported.")
-            audio = np.frombuffer(frames, dtype=np.int16)
-            if n_channels > 1:
-                audio = audio.reshape(-1, n_channels)
-                audio = np.mean(audio, axis=1).astype(np.int16)
+        wf = wave.open(wav_path, 'rb')
     except Exception as e:
         raise RuntimeError(f"Error reading WAV: {e}")
-
-    if len(bits) > audio.size // 2:
-        raise ValueError("Message too large for this audio file.")
-
-    audio_fft = np.fft.fft(audio)
-    magnitude = np.abs(audio_fft)
-    phase = np.angle(audio_fft)
-
-    max_bins = len(phase)//2
-    if len(bits) > max_bins:
-        raise ValueError("Message too large for available phase bins.")
-
-    for i, bit in enumerate(bits, start=1):
-        phase[i] = 0.0 if bit == '0' else (np.pi / 2)
-        phase[-i] = -phase[i]
-
-    modified_fft = magnitude * np.exp(1j * phase)
-    modified_audio = np.fft.ifft(modified_fft).real
-    modified_audio = np.round(modified_audio).astype(np.int16)
-
+    if wf.getsampwidth() != 2:
+        wf.close()
+        raise ValueError("Only 16-bit PCM WAV supported.")
+    return wf
+
+def _phase_embed(segment, bits):
+    """Write bits into the phases of a (PHASE_SEGMENT,) int16 view, in place."""
+    spectrum = np.fft.rfft(segment.astype(np.float32))
+    data = spectrum[1:1 + bits.size]
+    spectrum[1:1 + bits.size] = np.abs(data) * np.where(bits == 1, 1j, 1)
+    restored = np.fft.irfft(spectrum, n=segment.size)
+    segment[:] = np.clip(np.round(restored), -32768, 32767)
+
+def _phase_decode(segment):
+    phase = np.angle(np.fft.rfft(segment.astype(np.float32))[1:1 + PHASE_BITS])
+    return (np.abs(np.abs(phase) - np.pi / 2) < np.pi / 4).astype(np.uint8)
+
+def hide_audio_phase(wav_path, message, output_path, block_frames=STREAM_BLOCK_FRAMES, progress=None,
+                     compress=True):
+    with span("encode"):
+        bits = message_to_bits(message, compress)
+    with _phase_open(wav_path) as wf:
+        n_channels = wf.getnchannels()
+        if bits.size > (wf.getnframes() // PHASE_SEGMENT) * PHASE_BITS:
+            raise ValueError("Message too large for this audio file.")
+
+    def embed_block(block, offset):
+        channel = np.frombuffer(block, dtype='<i2').reshape(-1, n_channels)[:, 0]
+        first = offset // (2 * n_channels) // PHASE_SEGMENT
+        for j in range(channel.size // PHASE_SEGMENT):
+            chunk = bits[(first + j) * PHASE_BITS:(first + j + 1) * PHASE_BITS]
+            if not chunk.size:
+                break
+            _phase_embed(channel[j * PHASE_SEGMENT:(j + 1) * PHASE_SEGMENT], chunk)
+        return (first + channel.size // PHASE_SEGMENT) * PHASE_BITS >= bits.size
+
+    block_frames = max(1, block_frames // PHASE_SEGMENT) * PHASE_SEGMENT
     try:
-        with wave.open(output_path, 'wb') as out_wav:
-            out_wav.setparams((1, 2, framerate, len(modified_audio), comptype, compname))
-            out_wav.writeframes(modified_audio.tobytes())
-    except Exception as e:
+        return _stream_embed(wav_path, output_path, embed_block, block_frames, progress)
+    except wave.Error as e:
         raise RuntimeError(f"Error writing WAV file: {e}")
-    return output_path
 
-def extract_audio_phase(wav_path):
-    if not os.path.exists(wav_path):
-        raise FileNotFoundError("WAV file not found")
-    try:
-        with wave.open(wav_path, 'rb') as wav:
-            n_channels, sampwidth, framerate, n_frames, comptype, compname = wav.getparams()
-            frames = wav.readframes(n_frames)
-            if sampwidth != 2:
-                raise ValueError("Only 16-bit PCM WAV supported.")
-            audio = np.frombuffer(frames, dtype=np.int16)
-            if n_channels > 1:
-                audio = audio.reshape(-1, n_channels)
-                audio = np.mean(audio, axis=1).astype(np.int16)
-    except Exception as e:
-        raise RuntimeError(f"Error reading WAV: {e}")
-
-    audio_fft = np.fft.fft(audio)
-    phase = np.angle(audio_fft)
-
-    max_bins = len(phase)//2
-    raw_bits = []
-    for i in range(1, max_bins):
-        p = phase[i]
-        if abs(p) < (np.pi/4):
-            raw_bits.append('0')
-        elif abs(abs(p) - (np.pi/2)) < (np.pi/4):
-            raw_bits.append('1')
-        else:
-            raw_bits.append('0')
-
-    if len(raw_bits) < 32:
-        return ''
-
-    header_bits = ''.join(raw_bits[:32])
-    length = int(header_bits, 2)
-    total_needed = 32 + length * 8
-    if len(raw_bits) < total_needed:
-        return ''
-    payload_bits = ''.join(raw_bits[32:32 + length * 8])
-    return bits_to_message_by_length(payload_bits, length)
+def extract_audio_phase(wav_path, progress=None):
+    with _phase_open(wav_path) as wf:
+        n_channels = wf.getnchannels()
+
+        def read_bits(start, count):
+            first = start // PHASE_BITS
+            last = (start + count - 1) // PHASE_BITS
+            wf.setpos(first * PHASE_SEGMENT)
+            decoded = []
+            for _ in range(first, last + 1):
+                frames = wf.readframes(PHASE_SEGMENT)
+                decoded.append(_phase_decode(np.frombuffer(frames, dtype='<i2').reshape(-1, n_channels)[:, 0]))
+            bits = np.concatenate(decoded) if decoded else np.empty(0, dtype=np.uint8)
+            offset = start - first * PHASE_BITS
+            return bits[offset:offset + count]
+
+        with span("decode"):
+            message = decode_message(read_bits, (wf.getnframes() // PHASE_SEGMENT) * PHASE_BITS)
+    if progress:
+        progress(1.0)
+    return message
 
 # ---------------- Echo ----------------
-def hide_audio_echo(wav_path, message, output_path, delay_samples=120):
+# Bit i lives at frame p = i * (delay_samples + 2): the frame delay_samples
+# later is overwritten with +frame[p] for a 1 and -frame[p] for a 0, on every
+# channel. The bits are the usual payload frame. Carriers written before the
+# frame existed hold a NUL-terminated message at interleaved sample (not
+# frame) positions, which the extractors fall back to.
+def _echo_embed(samples, bits, delay_samples):
+    """Embed bits into a writable (frames, channels) int16 array starting at frame 0."""
+    p = np.arange(bits.size) * (delay_samples + 2)
+    samples[p + delay_samples] = np.where(bits[:, None] == 1, samples[p], -samples[p])
+
+def _echo_decode(samples, delay_samples):
+    """Return one bit per whole echo step in a (frames, channels) int16 array (majority vote over channels)."""
+    p = np.arange(samples.shape[0] // (delay_samples + 2)) * (delay_samples + 2)
+    a = samples[p]
+    b = samples[p + delay_samples]
+    votes = ((a != 0) & (b != 0) & ((a < 0) == (b < 0))).sum(axis=1)
+    return (votes * 2 >= samples.shape[1]).astype(np.uint8)
+
+def _echo_samples(buf, n_channels):
+    return np.frombuffer(buf, dtype='<i2').reshape(-1, n_channels)
+
+def _legacy_echo_bits(blocks, delay_samples):
+    """'0'/'1' strings of the pre-frame layout, one per block of interleaved samples (whole echo steps)."""
+    for block in blocks:
+        bits = _echo_decode(_echo_samples(block, 1), delay_samples)
+        yield (bits + ord('0')).tobytes().decode('ascii')
+
+def _legacy_echo_message(blocks, delay_samples):
+    with span("decode", layout="legacy"):
+        return payload.decode_bit_string(_legacy_echo_bits(blocks, delay_samples))
+
+def hide_audio_echo(wav_path, message, output_path, delay_samples=120, progress=None, compress=True):
     if not os.path.exists(wav_path):
         raise FileNotFoundError("WAV file not found")
-    message += "\0"
-    bits = "".join(format(ord(c), "08b") for c in message)
+    with span("encode"):
+        bits = message_to_bits(message, compress)
 
-    with wave.open(wav_path, "rb") as wf:
-        params = wf.getparams()
-        frames = wf.readframes(wf.getnframes())
+    with span("load", path=wav_path):
+        with wave.open(wav_path, "rb") as wf:
+            params = wf.getparams()
+            frames = bytearray(wf.readframes(wf.getnframes()))
 
     if params.sampwidth != 2:
         raise ValueError("Echo method expects 16-bit PCM WAV")
 
-    fmt = "<" + "h" * (len(frames) // 2)
-    samples = np.array(struct.unpack(fmt, frames), dtype=np.int16)
-
-    step = delay_samples + 2
-    max_bits = len(samples) // step
-    if len(bits) > max_bits:
+    samples = _echo_samples(frames, params.nchannels)
+    if bits.size > samples.shape[0] // (delay_samples + 2):
         raise ValueError("Message too long for audio (echo)")
-
-    for i, bit in enumerate(bits):
-        p = i * step
-        idx = p + delay_samples
-        if idx >= len(samples):
-            break
-        if bit == "1":
-            samples[idx] = samples[p]
-        else:
-            samples[idx] = -samples[p]
-
-    packed = struct.pack(fmt, *samples.tolist())
-    with wave.open(output_path, "wb") as wf:
-        wf.setparams(params)
-        wf.writeframes(packed)
+    if progress:
+        progress(0.4)
+    with span("embed", bits=bits.size):
+        _echo_embed(samples, bits, delay_samples)
+    if progress:
+        progress(0.6)
+
+    with span("write", path=output_path):
+        with wave.open(output_path, "wb") as wf:
+            wf.setparams(params)
+            wf.writeframes(frames)
+    if progress:
+        progress(1.0)
     return output_path
 
-def extract_audio_echo(wav_path, delay_samples=120):
+def extract_audio_echo(wav_path, delay_samples=120, progress=None):
     if not os.path.exists(wav_path):
         raise FileNotFoundError("WAV file not found")
-    with wave.open(wav_path, "rb") as wf:
-        n_channels, sampwidth, framerate, n_frames = wf.getparams()[:4]
-        frames = wf.readframes(n_frames)
+    with span("load", path=wav_path):
+        params, frames = load_wav(wav_path)
+    n_channels, sampwidth = params[:2]
 
     if sampwidth != 2:
         raise ValueError("Echo method expects 16-bit PCM WAV")
 
-    fmt = "<" + "h" * (len(frames) // 2)
-    samples = np.array(struct.unpack(fmt, frames), dtype=np.int16)
+    if progress:
+        progress(0.5)
+    with span("decode"):
+        bits = _echo_decode(_echo_samples(frames, n_channels), delay_samples)
+        message = decode_message(lambda start, count: bits[start:start + count], bits.size)
+    if not message:
+        # Bytes of whole echo steps of samples
+        block = _echo_block_frames(STREAM_BLOCK_FRAMES, delay_samples + 2) * 2
+        data = memoryview(frames).cast('B')
+        message = _legacy_echo_message((data[i:i + block] for i in range(0, len(data), block)), delay_samples)
+    if progress:
+        progress(1.0)
+    return message
+
+# ---------------- Streaming (block-wise, bounded memory) ----------------
+# Frames are read and written in blocks of STREAM_BLOCK_FRAMES; once the
+# payload has been written the rest of the file is copied through untouched
+# in COPY_BLOCK_FRAMES blocks.
+
+def _stream_embed(wav_path, output_path, embed_block, block_frames, progress=None):
+    """embed_block(block, byte_offset) patches a writable uint8 block in place and
+    returns True once the whole payload has been written. progress(fraction)
+    is called after every block; each block gets read/embed/write spans."""
+    with wave.open(wav_path, 'rb') as src, wave.open(output_path, 'wb') as dst:
+        dst.setparams(src.getparams())
+        total = max(1, _data_size(src))
+        offset = 0
+        done = False
+        while not done:
+            with span("read"):
+                data = src.readframes(block_frames)
+            if not data:
+                break
+            block = bytearray(data)
+            with span("embed", offset=offset):
+                done = embed_block(np.frombuffer(block, dtype=np.uint8), offset)
+            with span("write"):
+                dst.writeframes(block)
+            offset += len(block)
+            if progress:
+                progress(min(1.0, offset / total))
+        with span("copy"):
+            while True:
+                data = src.readframes(COPY_BLOCK_FRAMES)
+                if not data:
+                    break
+                dst.writeframes(data)
+                offset += len(data)
+                if progress:
+                    progress(min(1.0, offset / total))
+    return output_path
 
+def _stream_embed_bits(wav_path, message, output_path, embed, block_frames, progress=None, compress=True):
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with span("encode"):
+        bits = message_to_bits(message, compress)
+    with wave.open(wav_path, 'rb') as wf:
+        if bits.size > _sample_count(wf):
+            raise ValueError('Message too long for audio')
+        sampwidth = wf.getsampwidth()
+
+    def embed_block(block, offset):
+        # Blocks hold whole frames, so they start on a sample boundary
+        low = block[::sampwidth]
+        first = offset // sampwidth
+        chunk = bits[first:first + low.size]
+        if chunk.size:
+            embed(low, chunk)
+        return first + low.size >= bits.size
+
+    return _stream_embed(wav_path, output_path, embed_block, block_frames, progress)
+
+def hide_audio_lsb_stream(wav_path, message, output_path, block_frames=STREAM_BLOCK_FRAMES, progress=None,
+                          compress=True):
+    return _stream_embed_bits(wav_path, message, output_path,
+                              lambda block, chunk: embed_plane(block, chunk, 0), block_frames, progress, compress)
+
+def hide_audio_parity_stream(wav_path, message, output_path, block_frames=STREAM_BLOCK_FRAMES, progress=None,
+                             compress=True):
+    return _stream_embed_bits(wav_path, message, output_path, embed_parity, block_frames, progress, compress)
+
+# The LSB/parity extractors above already read only the header and payload
+# frames, so they double as the streaming extractors.
+extract_audio_lsb_stream = extract_audio_lsb
+extract_audio_parity_stream = extract_audio_parity
+
+def _echo_block_frames(block_frames, step):
+    # Blocks hold whole echo steps so a bit never straddles two blocks
+    return max(1, block_frames // step) * step
+
+def hide_audio_echo_stream(wav_path, message, output_path, delay_samples=120, block_frames=STREAM_BLOCK_FRAMES,
+                           progress=None, compress=True):
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with span("encode"):
+        bits = message_to_bits(message, compress)
     step = delay_samples + 2
-    nbits = len(samples) // step
-    bits = ""
-
-    for i in range(nbits):
-        p = i * step
-        idx = p + delay_samples
-        if idx >= len(samples):
-            break
-        a = int(samples[p])
-        b = int(samples[idx])
-
-        if a == 0 or b == 0:
-            bit = "0"
-        else:
-            same_sign = (a >= 0 and b >= 0) or (a < 0 and b < 0)
-            bit = "1" if same_sign else "0"
-
-        bits += bit
-        if len(bits) >= 8 and bits.endswith("00000000"):
-            break
-
-    message = ""
-    for i in range(0, len(bits), 8):
-        byte = bits[i:i + 8]
-        if len(byte) < 8:
-            break
-        c = chr(int(byte, 2))
-        if c == "\0":
-            return message
-        message += c
+    with wave.open(wav_path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError("Echo method expects 16-bit PCM WAV")
+        if bits.size > wf.getnframes() // step:
+            raise ValueError("Message too long for audio (echo)")
+        n_channels = wf.getnchannels()
+
+    def embed_block(block, offset):
+        samples = _echo_samples(block, n_channels)
+        first = (offset // (2 * n_channels)) // step
+        n = min(samples.shape[0] // step, bits.size - first)
+        if n > 0:
+            _echo_embed(samples, bits[first:first + n], delay_samples)
+        return first + n >= bits.size
+
+    return _stream_embed(wav_path, output_path, embed_block, _echo_block_frames(block_frames, step), progress)
+
+def extract_audio_echo_stream(wav_path, delay_samples=120, block_frames=STREAM_BLOCK_FRAMES, progress=None):
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with wave.open(wav_path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError("Echo method expects 16-bit PCM WAV")
+        n_channels = wf.getnchannels()
+        n_frames = max(1, wf.getnframes())
+        step = delay_samples + 2
+        block_frames = _echo_block_frames(block_frames, step)
+        decoded = [np.empty(0, dtype=np.uint8)]
+
+        # Decode blocks only until the requested bits are available
+        def read_bits(start, count):
+            available = decoded[0].size
+            pieces = [decoded[0]]
+            while available < start + count:
+                data = wf.readframes(block_frames)
+                if not data:
+                    break
+                if progress:
+                    progress(min(1.0, wf.tell() / n_frames))
+                bits = _echo_decode(_echo_samples(data, n_channels), delay_samples)
+                pieces.append(bits)
+                available += bits.size
+            decoded[0] = np.concatenate(pieces)
+            return decoded[0][start:start + count]
+
+        with span("decode"):
+            message = decode_message(read_bits, wf.getnframes() // step)
+        if not message:
+            wf.rewind()
+            # block_frames is a whole number of steps, so its samples are too
+            blocks = iter(lambda: wf.readframes(block_frames), b'')
+            message = _legacy_echo_message(blocks, delay_samples)
     return message
+
+# ---------------- Memory-mapped (in-place patching) ----------------
+# LSB/parity only change the low bytes of the first 8 * frame size samples,
+# so instead of rewriting the file we copy it (or use it directly with
+# in_place=True) and patch those bytes through a NumPy memmap at the data
+# chunk offset.
+def _data_chunk(wav_path):
+    """Return (offset, size) of the data chunk of a RIFF/WAVE file."""
+    file_size = os.path.getsize(wav_path)
+    with open(wav_path, 'rb') as f:
+        head = f.read(12)
+        if head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+            raise ValueError("Not a RIFF/WAVE file")
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError("WAV data chunk not found")
+            size = int.from_bytes(chunk[4:], 'little')
+            if chunk[:4] == b'data':
+                return f.tell(), min(size, file_size - f.tell())
+            f.seek(size + (size & 1), 1)
+
+def _mmap_embed(wav_path, blocks, output_path, in_place, embed, progress=None, k=1):
+    """Patch a payload frame, given as byte blocks (header first), into the data chunk."""
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    # wave.open rejects anything that is not uncompressed PCM
+    with wave.open(wav_path, 'rb') as wf:
+        n_samples = _sample_count(wf)
+        sampwidth = wf.getsampwidth()
+    blocks = iter(blocks)
+    first = next(blocks)
+    n_low = -(-payload.parse_header(first) * 8 // k)
+    if n_low > n_samples:
+        raise ValueError('Message too long for audio')
+    offset, _ = _data_chunk(wav_path)
+    if in_place:
+        output_path = wav_path
+    elif output_path is None:
+        raise ValueError("output_path is required unless in_place=True")
+    elif os.path.abspath(output_path) != os.path.abspath(wav_path):
+        with span("copy", path=output_path):
+            shutil.copyfile(wav_path, output_path)
+    with span("embed", samples=n_low):
+        data = np.memmap(output_path, dtype=np.uint8, mode='r+', offset=offset, shape=(n_low * sampwidth,))
+        embed_frame(data[::sampwidth], itertools.chain([first], blocks), embed, progress, k)
+    with span("write"):
+        data.flush()
+        del data
+    if progress:
+        progress(1.0)
+    return output_path
+
+def hide_audio_lsb_mmap(wav_path, message, output_path=None, in_place=False, progress=None, compress=True):
+    with span("encode"):
+        frame = message_to_bytes(message, compress)
+    return _mmap_embed(wav_path, [frame], output_path, in_place,
+                       lambda data, bits: embed_plane(data, bits, 0), progress)
+
+def hide_audio_parity_mmap(wav_path, message, output_path=None, in_place=False, progress=None, compress=True):
+    with span("encode"):
+        frame = message_to_bytes(message, compress)
+    return _mmap_embed(wav_path, [frame], output_path, in_place, embed_parity, progress)
+
+def hide_audio_klsb_mmap(wav_path, message, output_path=None, k=2, in_place=False, progress=None,
+                         compress=True):
+    check_k(k)
+    with span("encode"):
+        frame = message_to_bytes(message, compress)
+    return _mmap_embed(wav_path, [frame], output_path, in_place,
+                       lambda data, bits: embed_klsb(data, bits, k), progress, k)
+
+def mmap_supported(wav_path):
+    """True if wav_path is a PCM WAV whose data chunk the *_mmap functions can patch."""
+    try:
+        with wave.open(wav_path, 'rb'):
+            pass
+        _data_chunk(wav_path)
+    except (OSError, EOFError, ValueError, wave.Error):
+        return False
+    return True
+
+# ---------------- Binary payloads ----------------
+# bytes or a binary file object instead of a str message, for LSB, parity
+# and k-LSB (Phase and Echo carry a few bits per thousand frames, too little
+# for files). The frame is streamed block by block into a memmap of the
+# output's data chunk, so neither the payload nor the carrier is loaded
+# whole; extraction reads only the frames that hold the payload.
+def _bytes_codec(method, k=2):
+    """(embed, read_bits, bits per byte) for an audio method name."""
+    if method == "LSB":
+        return (lambda data, bits: embed_plane(data, bits, 0)), (lambda values: read_plane(values, 0)), 1
+    if method == "Parity":
+        return embed_parity, read_parity, 1
+    if method == "kLSB":
+        check_k(k)
+        return (lambda data, bits: embed_klsb(data, bits, k)), (lambda values: read_klsb(values, k)), k
+    raise ValueError(f"Binary payloads are not supported for audio method: {method}")
+
+def hide_bytes(wav_path, data, output_path=None, method="LSB", k=2, in_place=False, progress=None):
+    embed, _, k = _bytes_codec(method, k)
+    return _mmap_embed(wav_path, payload.iter_pack(data), output_path, in_place, embed, progress, k)
+
+def extract_bytes(wav_path, method="LSB", k=2, sink=None, progress=None):
+    """Hidden payload as bytes, or written to sink.write (returns the byte count); None if there is none."""
+    _, read_bits, k = _bytes_codec(method, k)
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with wave.open(wav_path, 'rb') as wf:
+        read = element_reader(lambda start, count: _read_low_bytes(wf, start, count), read_bits, k)
+        with span("decode"):
+            result = extract_payload(byte_reader(read), _sample_count(wf) * k // 8, sink)
+    if progress:
+        progress(1.0)
+    return result
+
+# ---------------- Scan (LSB + parity) ----------------
+def scan_audio(wav_path, max_length=None, progress=None):
+    """Try sample LSB and parity on one decode; returns ranked candidates."""
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with span("load", path=wav_path):
+        params, data = load_wav(wav_path)
+    low = data[::params.sampwidth]
+    if progress:
+        progress(0.5)
+    with span("scan"):
+        results = scan_carrier(low, planes=(0,), max_length=max_length or low.size // 8)
+    if progress:
+        progress(1.0)
+    return results
+
+# ---------------- Capacity ----------------
+def capacity(wav_path, method="LSB", delay_samples=120, k=2, **params):
+    """Max message size in UTF-8 bytes for method, from the WAV header only."""
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with wave.open(wav_path, 'rb') as wf:
+        n_frames = wf.getnframes()
+        sampwidth = wf.getsampwidth()
+        n_samples = _sample_count(wf)
+    if method in ("LSB", "Parity"):
+        bits = n_samples
+    elif method == "kLSB":
+        bits = n_samples * check_k(k)
+    elif method in ("Phase", "Echo") and sampwidth != 2:
+        return 0
+    elif method == "Phase":
+        bits = (n_frames // PHASE_SEGMENT) * PHASE_BITS
+    elif method == "Echo":
+        # One bit per echo step
+        bits = n_frames // (delay_samples + 2)
+    else:
+        raise ValueError(f"Unknown audio method: {method}")
+    # Uncompressed frame size; compressible messages may fit a little more
+    return max(0, bits // 8 - payload.OVERHEAD)
+
+def channel_capacity(wav_path, method="LSB", k=2):
+    """Per-channel figures for the sample-wise methods (LSB, kLSB, Parity).
+
+    Payload bits are spread over the samples in frame order, so at full
+    capacity every channel carries the same number of bytes.
+    """
+    if method not in ("LSB", "kLSB", "Parity"):
+        raise ValueError(f"Per-channel capacity is only defined for LSB, kLSB and Parity, not {method}")
+    if not os.path.exists(wav_path):
+        raise FileNotFoundError("WAV file not found")
+    with wave.open(wav_path, 'rb') as wf:
+        n_channels = wf.getnchannels()
+        sampwidth = wf.getsampwidth()
+        n_frames = wf.getnframes()
+    bits_per_sample = check_k(k) if method == "kLSB" else 1
+    return {
+        "channels": n_channels,
+        "sample_width": sampwidth,
+        "bits_per_sample": bits_per_sample,
+        "bytes_per_channel": n_frames * bits_per_sample // 8,
+        "total": capacity(wav_path, method, k=k),
+    }
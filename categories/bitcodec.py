@@ -0,0 +1,252 @@
+# bitcodec.py
+# Shared bit packing helpers for the image and audio modules.
+# Everything works on flat uint8 NumPy arrays; bits are uint8 arrays of 0/1
+# in MSB-first order (the same order as format(b, '08b')).
+import itertools
+
+import numpy as np
+
+from categories import payload
+
+# Parity (popcount % 2) of every byte value
+PARITY_TABLE = (np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1) & 1).astype(np.uint8)
+
+# ----------------- Building bits -----------------
+def message_to_bytes(message, compress=True):
+    return payload.pack(message.encode('utf-8'), compress)
+
+def message_to_bits(message, compress=True):
+    return np.unpackbits(np.frombuffer(message_to_bytes(message, compress), dtype=np.uint8))
+
+# ----------------- Embedding -----------------
+def embed_plane(flat, bits, plane=0):
+    """Write bits into bit `plane` of the first len(bits) elements of flat, in place."""
+    if bits.size > flat.size:
+        raise ValueError("Message too large for carrier")
+    seg = flat[:bits.size]
+    seg &= np.uint8(~(1 << plane) & 0xFF)
+    seg |= bits << np.uint8(plane)
+    return flat
+
+def embed_parity(flat, bits):
+    """Flip the LSB wherever the element's parity does not match the bit, in place."""
+    if bits.size > flat.size:
+        raise ValueError("Message too large for carrier")
+    seg = flat[:bits.size]
+    seg ^= PARITY_TABLE[seg] ^ bits
+    return flat
+
+KLSB_MAX = 4
+
+def check_k(k):
+    if not 1 <= k <= KLSB_MAX:
+        raise ValueError(f"k must be between 1 and {KLSB_MAX}")
+    return k
+
+def embed_klsb(flat, bits, k):
+    """Write bits into the k low bits of the first ceil(len(bits) / k) elements of flat, in place.
+
+    Each element takes k consecutive bits, most significant first; the last
+    element is padded with zeros.
+    """
+    if bits.size % k:
+        bits = np.concatenate([bits, np.zeros(k - bits.size % k, dtype=np.uint8)])
+    n = bits.size // k
+    if n > flat.size:
+        raise ValueError("Message too large for carrier")
+    # packbits fills the high bits first, so shift the group down to bit 0
+    values = np.packbits(bits.reshape(n, k), axis=1)[:, 0] >> np.uint8(8 - k)
+    seg = flat[:n]
+    seg &= np.uint8(~((1 << k) - 1) & 0xFF)
+    seg |= values
+    return flat
+
+def embed_frame(flat, blocks, embed, progress=None, k=1):
+    """Embed a payload frame given as byte blocks (header first) into flat, in place.
+
+    embed(flat, bits) writes bits at the start of flat, k bits per element,
+    like embed_plane, embed_parity (k=1) or embed_klsb. The size declared in
+    the header is checked before anything is written; progress(fraction) is
+    called after every block.
+    """
+    blocks = iter(blocks)
+    first = next(blocks)
+    total = payload.parse_header(first) * 8
+    if -(-total // k) > flat.size:
+        raise ValueError("Payload too large for carrier")
+    done = 0
+    carry = np.empty(0, dtype=np.uint8)
+    for block in itertools.chain([first], blocks):
+        bits = np.unpackbits(np.frombuffer(block, dtype=np.uint8))
+        done += bits.size
+        if carry.size:
+            bits = np.concatenate([carry, bits])
+        # Only whole elements are written; the rest waits for the next block
+        usable = bits.size if done == total else bits.size - bits.size % k
+        embed(flat[(done - bits.size) // k:], bits[:usable])
+        carry = bits[usable:]
+        if progress:
+            progress(done / total)
+    return done
+
+# ----------------- Extraction -----------------
+def read_plane(values, plane=0):
+    return np.bitwise_and(values >> np.uint8(plane), 1)
+
+def read_parity(values):
+    return PARITY_TABLE[values]
+
+def read_klsb(values, k):
+    """The k low bits of every element, most significant first, as one flat bit array."""
+    return np.unpackbits(values[:, None], axis=1)[:, 8 - k:].reshape(-1)
+
+def element_reader(fetch, read_bits, k=1):
+    """Turn fetch(start, count) over carrier elements holding k bits each into read(start, count) over bits."""
+    def read(start, count):
+        first = start // k
+        values = fetch(first, -(-(start + count) // k) - first)
+        skip = start - first * k
+        return read_bits(values)[skip:skip + count]
+    return read
+
+def bits_to_bytes(bits):
+    return np.packbits(bits).tobytes()
+
+def decode_payload(read_bytes, total_bytes, legacy=True):
+    """Read a payload frame (or, with legacy, a length-prefixed message).
+
+    read_bytes(start, count) must return carrier bytes [start, start + count).
+    Only the header and the declared body are read; a length that does not
+    fit total_bytes is rejected before reading anything else. Returns the
+    payload bytes or None if there is no plausible message. Without legacy
+    only a frame whose CRC matches counts: any bits pass as a legacy length.
+    """
+    if total_bytes < payload.LEGACY_HEADER_SIZE:
+        return None
+    head = read_bytes(0, min(payload.HEADER_SIZE, total_bytes))
+    size = payload.parse_header(head)
+    if size is not None:
+        if size > total_bytes:
+            return None
+        try:
+            return payload.unpack(head + read_bytes(payload.HEADER_SIZE, size - payload.HEADER_SIZE))
+        except payload.PayloadError:
+            return None
+    if not legacy:
+        return None
+    # Carriers written before payload framing: 32-bit length + raw UTF-8
+    length = int.from_bytes(head[:payload.LEGACY_HEADER_SIZE], 'big')
+    if payload.LEGACY_HEADER_SIZE + length > total_bytes:
+        return None
+    return read_bytes(payload.LEGACY_HEADER_SIZE, length)
+
+def extract_payload(read_bytes, total_bytes, sink=None, block_size=payload.BLOCK_SIZE):
+    """Like decode_payload, but with a sink the payload is written to sink.write block by block.
+
+    Returns the number of bytes written, or None if there is no plausible
+    payload or its CRC does not match (the sink may then hold part of it).
+    """
+    if sink is None:
+        return decode_payload(read_bytes, total_bytes)
+    if total_bytes < payload.LEGACY_HEADER_SIZE:
+        return None
+    head = read_bytes(0, min(payload.HEADER_SIZE, total_bytes))
+    size = payload.parse_header(head)
+    if size is None:
+        length = int.from_bytes(head[:payload.LEGACY_HEADER_SIZE], 'big')
+        end = payload.LEGACY_HEADER_SIZE + length
+        if end > total_bytes:
+            return None
+        for start in range(payload.LEGACY_HEADER_SIZE, end, block_size):
+            sink.write(read_bytes(start, min(block_size, end - start)))
+        return length
+    if size > total_bytes:
+        return None
+    position = [0]
+
+    def read(count):
+        data = read_bytes(position[0], count)
+        position[0] += count
+        return data
+
+    try:
+        return payload.unpack_stream(read, sink, block_size)
+    except payload.PayloadError:
+        return None
+
+def byte_reader(read_bits):
+    """Turn read_bits(start, count) over carrier bits into read_bytes(start, count)."""
+    return lambda start, count: bits_to_bytes(read_bits(start * 8, count * 8))
+
+def decode_message(read_bits, total_bits, legacy=True):
+    """Decode a framed message; read_bits(start, count) returns carrier bits [start, start + count)."""
+    data = decode_payload(byte_reader(read_bits), total_bits // 8, legacy)
+    return '' if data is None else data.decode('utf-8', errors='replace')
+
+# ----------------- Scanning -----------------
+SCAN_MAX_LENGTH = 1 << 20
+
+def _printable_ratio(text):
+    if not text:
+        return 0.0
+    return sum(1 for c in text if c.isprintable() or c in '\t\r\n') / len(text)
+
+def scan_carrier(flat, planes=range(8), parity=True, max_length=SCAN_MAX_LENGTH):
+    """Try every bit plane (and parity) of a flat uint8 carrier in one pass.
+
+    A single np.unpackbits over the header prefix gives all 8 planes at
+    once. Candidates whose header is not a valid frame (or legacy length)
+    that fits the carrier and max_length are dropped; each remaining one
+    reads just its own plane over its own extent (one byte per carrier
+    value, not eight). Candidates whose CRC fails or whose payload is not
+    valid UTF-8 are dropped too; the rest are returned best first as dicts
+    with method, plane, length, message and score (share of printable
+    characters).
+    """
+    head_bits = payload.HEADER_SIZE * 8
+    if flat.size < head_bits:
+        return []
+    # Column 7 - p of the unpacked bits is plane p
+    header = np.unpackbits(flat[:head_bits, None], axis=1)
+    sources = [(p, header[:, 7 - p]) for p in planes]
+    if parity:
+        sources.append(('parity', PARITY_TABLE[flat[:head_bits]]))
+    extents = {}
+    for source, bits in sources:
+        head = bits_to_bytes(bits)
+        size = payload.parse_header(head)
+        if size is None:
+            size = payload.LEGACY_HEADER_SIZE + int.from_bytes(head[:payload.LEGACY_HEADER_SIZE], 'big')
+            if size == payload.LEGACY_HEADER_SIZE:
+                continue
+        if size <= max_length + payload.OVERHEAD and size * 8 <= flat.size:
+            extents[source] = size
+    if not extents:
+        return []
+
+    results = []
+    for source, size in extents.items():
+        if source == 'parity':
+            bits = PARITY_TABLE[flat[:size * 8]]
+        else:
+            bits = (flat[:size * 8] >> source) & 1
+        frame = bits_to_bytes(bits)
+        del bits
+        try:
+            if payload.parse_header(frame) is not None:
+                data = payload.unpack(frame)
+            else:
+                data = frame[payload.LEGACY_HEADER_SIZE:]
+            message = data.decode('utf-8')
+        except (payload.PayloadError, UnicodeDecodeError):
+            continue
+        if not message:
+            continue
+        if source == 'parity':
+            method, plane = 'Parity', None
+        else:
+            method, plane = ('LSB' if source == 0 else 'BitPlane'), source
+        results.append({"method": method, "plane": plane, "length": len(data),
+                        "message": message, "score": _printable_ratio(message)})
+    results.sort(key=lambda r: (r["score"], r["length"]), reverse=True)
+    return results
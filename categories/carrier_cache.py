@@ -0,0 +1,125 @@
+# carrier_cache.py
+# Size-bounded LRU cache of decoded carriers, shared by the extractors.
+# Entries are keyed by (kind, absolute path, mtime, size), so an edited file
+# is decoded again. Cached arrays are read-only; callers that modify pixels
+# or samples must copy them first.
+import os
+import threading
+import wave
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+class CarrierCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(kind, path):
+        st = os.stat(path)
+        return (kind, os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def peek(self, kind, path):
+        """Return the cached value or None, without loading (counts as a hit or miss)."""
+        key = self.key(kind, path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, kind, path, loader):
+        """Return the cached value for path, calling loader(path) -> (value, nbytes) on a miss."""
+        value = self.peek(kind, path)
+        if value is not None:
+            return value
+        value, nbytes = loader(path)
+        self.put(self.key(kind, path), value, nbytes)
+        return value
+
+    def put(self, key, value, nbytes):
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def resize(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+_cache = CarrierCache()
+
+# ----------------- Loaders -----------------
+def _decode_image(path):
+    from PIL import Image
+    pixels = np.asarray(Image.open(path).convert("RGB"), dtype=np.uint8)
+    pixels.setflags(write=False)
+    return pixels, pixels.nbytes
+
+def _decode_wav(path):
+    with wave.open(path, 'rb') as wf:
+        params = wf.getparams()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.uint8)
+    return (params, samples), samples.nbytes
+
+def load_image(path):
+    """Decoded RGB pixels of an image as a read-only (h, w, 3) uint8 array."""
+    return _cache.get("image", path, _decode_image)
+
+def load_wav(path):
+    """(wave params, read-only uint8 array of the raw frame bytes) of a WAV file."""
+    return _cache.get("wav", path, _decode_wav)
+
+def cached_wav(path):
+    """Like load_wav, but returns None instead of decoding on a miss."""
+    return _cache.peek("wav", path)
+
+def cache_stats():
+    return _cache.stats()
+
+def clear_cache():
+    _cache.clear()
+
+def set_cache_limit(max_bytes):
+    _cache.resize(max_bytes)
@@ -3,125 +3,195 @@ from PIL import Image
 import numpy as np
 import os
 
-# Utility helpers reused across modules
-def build_binary_with_header(message):
-    length = len(message.encode('utf-8'))
-    header = format(length, '032b')
-    payload = ''.join(format(b, '08b') for b in message.encode('utf-8'))
-    return header + payload
-
-def bits_to_message_by_length(bits, byte_length):
-    needed = byte_length * 8
-    if len(bits) < needed:
-        return None
-    message = ''
-    for i in range(0, needed, 8):
-        byte = bits[i:i+8]
-        message += chr(int(byte, 2))
-    try:
-        return bytes([ord(c) for c in message]).decode('utf-8', errors='replace')
-    except Exception:
-        return message
+from categories.bitcodec import (message_to_bits, embed_plane, embed_parity, embed_klsb, embed_frame, check_k,
+                                 read_plane, read_parity, read_klsb, element_reader, decode_message,
+                                 extract_payload, byte_reader, scan_carrier)
+from categories.carrier_cache import load_image
+from categories import payload
+from categories.trace import span
 
-# ----------------- LSB -----------------
-def hide_lsb_image(img_path, message, output_path):
+# ----------------- Output -----------------
+# Stego images must be written losslessly; the format follows the output
+# extension. PNG is zlib-compressed at compress_level (Pillow's default 6)
+# with an optional zlib strategy as compress_type: level 1, or
+# compress_type=zlib.Z_RLE, writes about twice as fast, often at a similar
+# size for noisy photos. .tif/.tiff (uncompressed) and .bmp skip
+# compression entirely, for intermediate files in a pipeline.
+PNG_COMPRESS_LEVEL = 6
+OUTPUT_FORMATS = {".png": "PNG", ".bmp": "BMP", ".tif": "TIFF", ".tiff": "TIFF"}
+
+def save_options(output_path, compress_level=PNG_COMPRESS_LEVEL, compress_type=None):
+    """Pillow save() keyword arguments for a lossless image at output_path."""
+    fmt = OUTPUT_FORMATS.get(os.path.splitext(output_path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Stego images need a lossless format ({', '.join(OUTPUT_FORMATS)}): {output_path}")
+    options = {"format": fmt}
+    if fmt == "PNG":
+        options["compress_level"] = compress_level
+        if compress_type is not None:
+            options["compress_type"] = compress_type
+    elif fmt == "TIFF":
+        options["compression"] = "raw"
+    return options
+
+# Shared load / embed / save steps. progress(fraction) is called between
+# stages; it may raise to cancel the operation. Each stage is a trace span.
+# The pixels live in one writable uint8 buffer that is embedded in place.
+def _load_pixels(img_path):
     if not os.path.exists(img_path):
         raise FileNotFoundError("Image path not found")
-    bits = build_binary_with_header(message)
-    img = Image.open(img_path).convert("RGB")
-    pixels = np.array(img, dtype=np.uint8).copy()
-    flat_pixels = pixels.ravel()
-    if len(bits) > len(flat_pixels):
+    with span("load", path=img_path):
+        img = Image.open(img_path)
+        img.load()
+    with span("convert"):
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        # np.array copies out of Pillow's storage, so the result is already writable
+        return np.array(img, dtype=np.uint8)
+
+def _save_pixels(pixels, output_path, options):
+    with span("write", path=output_path, **options):
+        Image.fromarray(pixels).save(output_path, **options)
+
+def _hide(img_path, message, output_path, embed, progress=None, k=1, save=None, compress=True):
+    options = save_options(output_path, **(save or {}))
+    with span("encode"):
+        bits = message_to_bits(message, compress)
+    pixels = _load_pixels(img_path)
+    flat = pixels.reshape(-1)
+    if bits.size > flat.size * k:
         raise ValueError("Message too large for image")
-    for i, bit in enumerate(bits):
-        flat_pixels[i] = (int(flat_pixels[i]) & 0xFE) | int(bit)
-    pixels = flat_pixels.reshape(pixels.shape)
-    Image.fromarray(pixels).save(output_path)
+    if progress:
+        progress(0.4)
+    with span("embed", bits=bits.size):
+        embed(flat, bits)
+    if progress:
+        progress(0.6)
+    _save_pixels(pixels, output_path, options)
+    if progress:
+        progress(1.0)
     return output_path
 
-def extract_lsb_image(img_path):
+def _extract(img_path, read_bits, progress=None, k=1):
     if not os.path.exists(img_path):
         raise FileNotFoundError("Image path not found")
-    img = Image.open(img_path).convert("RGB")
-    flat = np.array(img, dtype=np.uint8).ravel()
-    bits = ''.join(str(int(x) & 1) for x in flat)
-    if len(bits) < 32:
-        return ''
-    header_bits = bits[:32]
-    length = int(header_bits, 2)
-    total_bits_needed = 32 + length * 8
-    if len(bits) < total_bits_needed:
-        return ''
-    message_bits = bits[32:32 + length * 8]
-    return bits_to_message_by_length(message_bits, length)
+    # Decoded pixels are cached, so trying several methods/planes decodes once
+    with span("load", path=img_path):
+        flat = load_image(img_path).reshape(-1)
+    if progress:
+        progress(0.5)
+    with span("decode"):
+        message = decode_message(element_reader(lambda start, count: flat[start:start + count], read_bits, k),
+                                 flat.size * k)
+    if progress:
+        progress(1.0)
+    return message
+
+# ----------------- LSB -----------------
+def hide_lsb_image(img_path, message, output_path, progress=None, compress=True, **save):
+    return _hide(img_path, message, output_path, lambda flat, bits: embed_plane(flat, bits, 0), progress, save=save,
+                 compress=compress)
+
+def extract_lsb_image(img_path, progress=None):
+    return _extract(img_path, lambda values: read_plane(values, 0), progress)
 
 # ----------------- Parity -----------------
-def hide_parity_image(img_path, message, output_path):
-    if not os.path.exists(img_path):
-        raise FileNotFoundError("Image path not found")
-    bits = build_binary_with_header(message)
-    img = Image.open(img_path).convert("RGB")
-    pixels = np.array(img, dtype=np.uint8).copy()
-    flat = pixels.ravel()
-    if len(bits) > len(flat):
-        raise ValueError("Message too large for image")
-    for i, bit in enumerate(bits):
-        b = int(flat[i])
-        parity = bin(b).count('1') % 2
-        if parity != int(bit):
-            flat[i] ^= 1
-    pixels = flat.reshape(pixels.shape)
-    Image.fromarray(pixels).save(output_path)
+def hide_parity_image(img_path, message, output_path, progress=None, compress=True, **save):
+    return _hide(img_path, message, output_path, embed_parity, progress, save=save, compress=compress)
+
+def extract_parity_image(img_path, progress=None):
+    return _extract(img_path, read_parity, progress)
+
+# ----------------- Bit Plane -----------------
+def hide_bitplane_image(img_path, message, output_path, plane=1, progress=None, compress=True, **save):
+    return _hide(img_path, message, output_path, lambda flat, bits: embed_plane(flat, bits, plane), progress,
+                 save=save, compress=compress)
+
+def extract_bitplane_image(img_path, plane=1, progress=None):
+    return _extract(img_path, lambda values: read_plane(values, plane), progress)
+
+# ----------------- k-LSB -----------------
+# k (1-4) low bits of every channel value, so a payload touches k times
+# fewer values than LSB. k=1 is the same layout as LSB.
+def hide_klsb_image(img_path, message, output_path, k=2, progress=None, compress=True, **save):
+    check_k(k)
+    return _hide(img_path, message, output_path, lambda flat, bits: embed_klsb(flat, bits, k), progress, k, save,
+                 compress)
+
+def extract_klsb_image(img_path, k=2, progress=None):
+    check_k(k)
+    return _extract(img_path, lambda values: read_klsb(values, k), progress, k)
+
+# ----------------- Binary payloads -----------------
+# bytes or a binary file object instead of a str message, for any of the
+# methods above. The payload is framed uncompressed and embedded block by
+# block, so it is never held in memory as one bit array.
+def _codec(method, plane=1, k=2):
+    """(embed, read_bits, bits per value) for an image method name."""
+    if method == "Parity":
+        return embed_parity, read_parity, 1
+    if method == "kLSB":
+        check_k(k)
+        return (lambda flat, bits: embed_klsb(flat, bits, k)), (lambda values: read_klsb(values, k)), k
+    if method == "LSB":
+        plane = 0
+    elif method != "BitPlane":
+        raise ValueError(f"Unknown image method: {method}")
+    return (lambda flat, bits: embed_plane(flat, bits, plane)), (lambda values: read_plane(values, plane)), 1
+
+def hide_bytes(img_path, data, output_path, method="LSB", plane=1, k=2, progress=None, **save):
+    embed, _, k = _codec(method, plane, k)
+    options = save_options(output_path, **save)
+    pixels = _load_pixels(img_path)
+    with span("embed"):
+        embed_frame(pixels.reshape(-1), payload.iter_pack(data), embed,
+                    (lambda fraction: progress(0.9 * fraction)) if progress else None, k)
+    _save_pixels(pixels, output_path, options)
+    if progress:
+        progress(1.0)
     return output_path
 
-def extract_parity_image(img_path):
+def extract_bytes(img_path, method="LSB", plane=1, k=2, sink=None, progress=None):
+    """Hidden payload as bytes, or written to sink.write (returns the byte count); None if there is none."""
+    _, read_bits, k = _codec(method, plane, k)
     if not os.path.exists(img_path):
         raise FileNotFoundError("Image path not found")
-    img = Image.open(img_path).convert("RGB")
-    flat = np.array(img, dtype=np.uint8).ravel()
-    bits = ''.join(str(bin(int(x)).count('1') % 2) for x in flat)
-    if len(bits) < 32:
-        return ''
-    header_bits = bits[:32]
-    length = int(header_bits, 2)
-    total_bits_needed = 32 + length * 8
-    if len(bits) < total_bits_needed:
-        return ''
-    message_bits = bits[32:32 + length * 8]
-    return bits_to_message_by_length(message_bits, length)
+    with span("load", path=img_path):
+        flat = load_image(img_path).reshape(-1)
+    if progress:
+        progress(0.5)
+    read = element_reader(lambda start, count: flat[start:start + count], read_bits, k)
+    with span("decode"):
+        result = extract_payload(byte_reader(read), flat.size * k // 8, sink)
+    if progress:
+        progress(1.0)
+    return result
 
-# ----------------- Bit Plane -----------------
-def hide_bitplane_image(img_path, message, output_path, plane=1):
+# ----------------- Scan (all methods) -----------------
+def scan_image(img_path, max_length=None, progress=None):
+    """Try LSB, parity and bit planes 0-7 on one decode; returns ranked candidates."""
     if not os.path.exists(img_path):
         raise FileNotFoundError("Image path not found")
-    bits = build_binary_with_header(message)
-    img = Image.open(img_path).convert("RGB")
-    pixels = np.array(img, dtype=np.int32).copy()
-    flat = pixels.ravel()
-    if len(bits) > len(flat):
-        raise ValueError("Message too large for image")
-    for i, bit in enumerate(bits):
-        mask = 1 << plane
-        if int(bit) == 1:
-            flat[i] = int(flat[i]) | mask
-        else:
-            flat[i] = int(flat[i]) & (~mask)
-    pixels = flat.reshape(pixels.shape)
-    pixels = np.clip(pixels, 0, 255).astype(np.uint8)
-    Image.fromarray(pixels).save(output_path)
-    return output_path
+    with span("load", path=img_path):
+        flat = load_image(img_path).reshape(-1)
+    if progress:
+        progress(0.5)
+    with span("scan"):
+        results = scan_carrier(flat, max_length=max_length or flat.size // 8)
+    if progress:
+        progress(1.0)
+    return results
 
-def extract_bitplane_image(img_path, plane=1):
+# ----------------- Capacity -----------------
+def capacity(img_path, method="LSB", k=2, **params):
+    """Max message size in UTF-8 bytes for method, from the image header only (no pixel decode)."""
+    if method not in ("LSB", "Parity", "BitPlane", "kLSB"):
+        raise ValueError(f"Unknown image method: {method}")
+    bits_per_value = check_k(k) if method == "kLSB" else 1
     if not os.path.exists(img_path):
         raise FileNotFoundError("Image path not found")
-    img = Image.open(img_path).convert("RGB")
-    flat = np.array(img, dtype=np.uint8).ravel()
-    bits = ''.join(str((int(b) >> plane) & 1) for b in flat)
-    if len(bits) < 32:
-        return ''
-    length = int(bits[:32], 2)
-    total = 32 + length * 8
-    if len(bits) < total:
-        return ''
-    message_bits = bits[32:32 + length * 8]
-    return bits_to_message_by_length(message_bits, length)
+    with Image.open(img_path) as img:
+        width, height = img.size
+    # Pixels are always converted to RGB before embedding; the figure assumes
+    # an uncompressed frame, compressible messages may fit a little more
+    return max(0, (width * height * 3 * bits_per_value) // 8 - payload.OVERHEAD)
@@ -0,0 +1,245 @@
+# payload.py
+# Versioned payload frame shared by the image, audio and text codecs.
+#
+#   magic "SG" | version (1) | flags (1) | body length (4, big endian) | body | CRC32 of body (4)
+#
+# The low bits of flags name the compression used for the body. Compression
+# is only used when it makes the body smaller; a zlib pass over a prefix
+# decides whether it is worth trying at all. Carriers written before this
+# frame existed start with a bare 32-bit length (image/audio) or hold a
+# NUL-terminated message (text); parse_header returns None for those so the
+# codecs can fall back to the old layout. Binary payloads streamed from
+# files (iter_pack) are always stored uncompressed.
+import io
+import os
+import struct
+import zlib
+
+try:
+    import lzma
+except ImportError:  # Python built without _lzma
+    lzma = None
+
+MAGIC = b"SG"
+VERSION = 1
+HEADER_SIZE = 8
+TRAILER_SIZE = 4
+OVERHEAD = HEADER_SIZE + TRAILER_SIZE
+LEGACY_HEADER_SIZE = 4
+
+# Binary payloads are streamed in blocks of this many bytes
+BLOCK_SIZE = 1 << 20
+
+COMPRESS_NONE = 0
+COMPRESS_ZLIB = 1
+COMPRESS_LZMA = 2
+COMPRESS_MASK = 0x03
+
+# pack() compresses the first PROBE_SIZE bytes with zlib level 6 and stores
+# the body uncompressed unless that saves more than PROBE_GAIN of it (random
+# or already-compressed data never does). LZMA, which is slower and needs
+# about 12 MB of encoder state, is only tried on top of zlib for bodies of
+# at least LZMA_MIN_SIZE bytes.
+PROBE_SIZE = 64 * 1024
+PROBE_GAIN = 0.10
+ZLIB_LEVEL = 6
+LZMA_MIN_SIZE = 64 * 1024
+
+_HEADER = struct.Struct(">2sBBI")
+# Raw LZMA2 needs the same filter chain on both sides. A 1 MiB dictionary
+# keeps the encoder to about 12 MB (preset 9's 64 MiB dictionary needs
+# almost 700 MB) and payloads are rarely larger than that anyway.
+_LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6, "dict_size": 1 << 20}] if lzma else None
+
+class PayloadError(ValueError):
+    """A frame header was recognised but the body is damaged."""
+
+def _compress(data, codec):
+    if codec == COMPRESS_ZLIB:
+        c = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, -15)
+        return c.compress(data) + c.flush()
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+def _decompressor(codec):
+    if codec == COMPRESS_ZLIB:
+        return zlib.decompressobj(-15)
+    if codec == COMPRESS_LZMA:
+        if lzma is None:
+            raise PayloadError("Payload is LZMA-compressed but lzma is not available")
+        return lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+    return None
+
+def _decompress(body, codec):
+    if codec == COMPRESS_NONE:
+        return body
+    if codec == COMPRESS_ZLIB:
+        return zlib.decompress(body, -15)
+    if lzma is None:
+        raise PayloadError("Payload is LZMA-compressed but lzma is not available")
+    return lzma.decompress(body, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+def _choose(data):
+    """(codec, body) for data: uncompressed, zlib or LZMA, whichever is smallest of those worth trying."""
+    probe = data[:PROBE_SIZE]
+    packed = _compress(probe, COMPRESS_ZLIB)
+    if len(packed) > len(probe) * (1 - PROBE_GAIN):
+        return COMPRESS_NONE, data
+    if len(probe) < len(data):
+        packed = _compress(data, COMPRESS_ZLIB)
+    codec, body = COMPRESS_ZLIB, packed
+    if lzma is not None and len(data) >= LZMA_MIN_SIZE:
+        packed = _compress(data, COMPRESS_LZMA)
+        if len(packed) < len(body):
+            codec, body = COMPRESS_LZMA, packed
+    if len(body) >= len(data):
+        return COMPRESS_NONE, data
+    return codec, body
+
+def pack(data, compress=True):
+    """Frame raw bytes; with compress, the body is compressed only when that makes it smaller."""
+    codec, body = COMPRESS_NONE, data
+    if compress and data:
+        codec, body = _choose(data)
+    header = _HEADER.pack(MAGIC, VERSION, codec, len(body))
+    return header + body + struct.pack(">I", zlib.crc32(body))
+
+def parse_header(header):
+    """Total frame size for the first HEADER_SIZE bytes, or None if they are not a frame header."""
+    if len(header) < HEADER_SIZE:
+        return None
+    magic, version, flags, length = _HEADER.unpack(bytes(header[:HEADER_SIZE]))
+    if magic != MAGIC or version != VERSION or flags not in (COMPRESS_NONE, COMPRESS_ZLIB, COMPRESS_LZMA):
+        return None
+    return HEADER_SIZE + length + TRAILER_SIZE
+
+def unpack(frame):
+    """Verify the CRC and return the decompressed body of a complete frame."""
+    frame = bytes(frame)
+    size = parse_header(frame)
+    if size is None or len(frame) < size:
+        raise PayloadError("Incomplete or invalid payload frame")
+    body = frame[HEADER_SIZE:size - TRAILER_SIZE]
+    (crc,) = struct.unpack(">I", frame[size - TRAILER_SIZE:size])
+    if zlib.crc32(body) != crc:
+        raise PayloadError("Payload CRC mismatch")
+    try:
+        return _decompress(body, frame[3] & COMPRESS_MASK)
+    except (zlib.error, getattr(lzma, "LZMAError", zlib.error)) as e:
+        raise PayloadError(f"Payload does not decompress: {e}")
+
+# ----------------- Bit strings -----------------
+# For codecs that decode their carriers to '0'/'1' text.
+def decode_bit_string(bit_chunks):
+    """Turn an iterable of '0'/'1' strings into the hidden message.
+
+    The first bytes decide the layout: a payload frame is read up to its
+    declared size, anything else is a pre-frame carrier (text, echo audio)
+    holding a latin-1 message up to the first NUL byte. Stops consuming
+    bit_chunks as soon as the message is complete; returns "" if there is none.
+    """
+    bits = ""
+    data = bytearray()
+    size = None
+    for piece in bit_chunks:
+        bits += piece
+        n_bytes = len(bits) // 8
+        if not n_bytes:
+            continue
+        start = len(data)
+        data += int(bits[:n_bytes * 8], 2).to_bytes(n_bytes, "big")
+        bits = bits[n_bytes * 8:]
+        if size is None and len(data) >= HEADER_SIZE:
+            size = parse_header(data) or 0
+            start = 0
+        if size:
+            if len(data) >= size:
+                break
+        elif size == 0:
+            end = data.find(b"\0", start)
+            if end >= 0:
+                return data[:end].decode("latin-1")
+    else:
+        if size is None:
+            # Too short for a frame header: only a legacy message can fit
+            end = data.find(b"\0")
+            return data[:end].decode("latin-1") if end >= 0 else ""
+        if not size:
+            return ""
+    try:
+        return unpack(data[:size]).decode("utf-8", errors="replace")
+    except PayloadError:
+        return ""
+
+# ----------------- Streaming -----------------
+def _remaining_size(source):
+    """Bytes left in a seekable binary file object, or None if it cannot seek."""
+    try:
+        pos = source.tell()
+        end = source.seek(0, os.SEEK_END)
+        source.seek(pos)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    return end - pos
+
+def iter_pack(source, block_size=BLOCK_SIZE):
+    """Yield an uncompressed frame for bytes or a binary file object: header, body blocks, trailer.
+
+    Seekable files are read block_size bytes at a time; other file objects
+    are read whole first, since the header needs the body length up front.
+    """
+    length = None if isinstance(source, (bytes, bytearray, memoryview)) else _remaining_size(source)
+    if length is None:
+        data = memoryview(source if isinstance(source, (bytes, bytearray, memoryview)) else source.read()).cast("B")
+        length = len(data)
+        blocks = (data[i:i + block_size] for i in range(0, length, block_size))
+    else:
+        blocks = iter(lambda: source.read(block_size), b"")
+    yield _HEADER.pack(MAGIC, VERSION, COMPRESS_NONE, length)
+    crc = 0
+    written = 0
+    for block in blocks:
+        block = block[:length - written]
+        crc = zlib.crc32(block, crc)
+        written += len(block)
+        yield block
+        if written == length:
+            break
+    if written != length:
+        raise ValueError("Payload source ended before its reported size")
+    yield struct.pack(">I", crc)
+
+def unpack_stream(read, sink, block_size=BLOCK_SIZE):
+    """Decode the frame read(n) returns into sink.write, block by block; returns bytes written.
+
+    The CRC can only be checked at the end, so on PayloadError the sink may
+    already hold part of a damaged body.
+    """
+    header = read(HEADER_SIZE)
+    size = parse_header(header)
+    if size is None:
+        raise PayloadError("No payload frame")
+    decompressor = _decompressor(header[3] & COMPRESS_MASK)
+    remaining = size - OVERHEAD
+    crc = 0
+    written = 0
+    try:
+        while remaining:
+            block = read(min(block_size, remaining))
+            if not block:
+                raise PayloadError("Payload frame is truncated")
+            remaining -= len(block)
+            crc = zlib.crc32(block, crc)
+            if decompressor is not None:
+                block = decompressor.decompress(block)
+            sink.write(block)
+            written += len(block)
+        if hasattr(decompressor, "flush"):
+            tail = decompressor.flush()
+            sink.write(tail)
+            written += len(tail)
+    except (zlib.error, getattr(lzma, "LZMAError", zlib.error)) as e:
+        raise PayloadError(f"Payload does not decompress: {e}")
+    (expected,) = struct.unpack(">I", read(TRAILER_SIZE))
+    if crc != expected:
+        raise PayloadError("Payload CRC mismatch")
+    return written
@@ -0,0 +1,287 @@
+# registry.py
+# Every steganography method, by category. An entry names its hide / extract
+# functions, capacity, integer parameters, carrier formats and optional
+# alternative backends; the GUI, the batch runner and the benchmarks all
+# dispatch through it. Functions are given by name and looked up in the
+# category module, which is only imported on first use: starting the GUI
+# or a headless tool does not load NumPy, Pillow or a codec it never runs.
+import importlib
+import os
+
+from categories.trace import span
+
+CATEGORY_MODULES = {
+    "Image": "categories.image_stego",
+    "Audio": "categories.audio_stego",
+    "Text": "categories.text_stego",
+    "Video": "categories.video_stego",
+}
+
+def load(category):
+    """The codec module of category, imported on the first call."""
+    return importlib.import_module(CATEGORY_MODULES[category])
+
+# ----------------- Method entries -----------------
+class Param:
+    """An integer method parameter: default value, allowed range and GUI label."""
+
+    def __init__(self, name, default, low=None, high=None, label=None):
+        self.name = name
+        self.default = default
+        self.low = low
+        self.high = high
+        self.label = label or name
+
+    def clamp(self, value):
+        if self.low is not None:
+            value = max(self.low, value)
+        if self.high is not None:
+            value = min(self.high, value)
+        return value
+
+class Backend:
+    """An alternative hide implementation, used when available(carrier) says the carrier supports it."""
+
+    def __init__(self, name, hide, available=None):
+        self.name = name
+        self.hide = hide
+        self.available = available
+
+class Method:
+    """One method of a category.
+
+    hide and extract are function names in the category module (or
+    callables) with the signatures hide(carrier, message, output_path,
+    progress=None, **params) and extract(carrier, progress=None, **params).
+    capacity(carrier, **params) gives the max message size; True uses the
+    category module's capacity(carrier, name, **params) and False means the
+    method cannot tell. detail(carrier, **params), if given, adds a short
+    note to the GUI's capacity figure. With stats, hide also takes a stats
+    dict to fill, and stats(filled dict) turns it into a log line.
+    preferred backends are tried in the order listed before the default
+    hide, and the first one available for the carrier is used; the order is
+    the entry's choice, not a timing. Manual methods (DeEgger) need a person
+    at a desktop and are left out of batch runs.
+    """
+
+    def __init__(self, category, name, hide, extract, params=(), formats=(), output_ext=None, preferred=(),
+                 capacity=True, manual=False, detail=None, stats=None):
+        self.category = category
+        self.name = name
+        self.hide_impl = hide
+        self.extract_impl = extract
+        self.params = tuple(params)
+        self.formats = tuple(formats)
+        self.output_ext = output_ext
+        self.preferred = tuple(preferred)
+        self.capacity_impl = capacity
+        self.has_capacity = capacity is not False
+        self.manual = manual
+        self.detail_impl = detail
+        self.stats_impl = stats
+        self.reports_stats = stats is not None
+
+    def __repr__(self):
+        return f"<method {self.category}/{self.name}>"
+
+    def _resolve(self, impl):
+        return getattr(load(self.category), impl) if isinstance(impl, str) else impl
+
+    def backends(self):
+        return [backend.name for backend in self.preferred] + ["default"]
+
+    def function_names(self, backend=None):
+        """Names of the module functions behind hide (for backend, by default the preferred one) and extract."""
+        choices = {b.name: b.hide for b in self.preferred}
+        if backend is None:
+            backend = self.preferred[0].name if self.preferred else "default"
+        hide = self.hide_impl if backend == "default" else choices[backend]
+        return [getattr(impl, "wraps", impl) for impl in (hide, self.extract_impl)]
+
+    def pick_backend(self, carrier):
+        """Name and hide function of the first backend, in preference order, that supports carrier (default last)."""
+        for backend in self.preferred:
+            if backend.available is None or self._resolve(backend.available)(carrier):
+                return backend.name, self._resolve(backend.hide)
+        return "default", self._resolve(self.hide_impl)
+
+    def hide(self, carrier, message, output_path, progress=None, backend=None, **params):
+        """Hide with the preferred backend available for carrier, or the one named by backend."""
+        if backend is None:
+            backend, fn = self.pick_backend(carrier)
+        elif backend == "default":
+            fn = self._resolve(self.hide_impl)
+        else:
+            choices = {b.name: b for b in self.preferred}
+            if backend not in choices:
+                raise ValueError(f"{self.category}/{self.name} has no backend {backend!r}")
+            fn = self._resolve(choices[backend].hide)
+        with span("hide", method=f"{self.category}/{self.name}", backend=backend):
+            return fn(carrier, message, output_path, progress=progress, **params)
+
+    def extract(self, carrier, progress=None, **params):
+        return self._resolve(self.extract_impl)(carrier, progress=progress, **params)
+
+    def capacity(self, carrier, **params):
+        """Max message size in UTF-8 bytes, or None if the method cannot tell."""
+        if not self.has_capacity:
+            return None
+        if self.capacity_impl is True:
+            return load(self.category).capacity(carrier, self.name, **params)
+        return self._resolve(self.capacity_impl)(carrier, **params)
+
+    def capacity_detail(self, carrier, **params):
+        """Short note shown next to the capacity figure, or an empty string."""
+        return self._resolve(self.detail_impl)(carrier, **params) if self.detail_impl else ""
+
+    def format_stats(self, stats):
+        """Log line for the stats dict a hide filled in (methods with reports_stats)."""
+        return self._resolve(self.stats_impl)(stats)
+
+    def default_params(self):
+        return {param.name: param.default for param in self.params}
+
+    def output_extension(self):
+        return self.output_ext() if callable(self.output_ext) else self.output_ext
+
+    def supports(self, path):
+        return os.path.splitext(path)[1].lower() in self.formats
+
+_METHODS = {}
+
+def register(method):
+    """Add (or replace) a method; it is listed after the ones already in its category."""
+    _METHODS[(method.category, method.name)] = method
+    return method
+
+def get(category, name):
+    try:
+        return _METHODS[(category, name)]
+    except KeyError:
+        raise ValueError(f"Unknown method {category}/{name}") from None
+
+def categories():
+    return list(dict.fromkeys(category for category, _ in _METHODS))
+
+def methods(category=None):
+    return [m for (c, _), m in _METHODS.items() if category is None or c == category]
+
+def guess_category(path):
+    """Category whose methods accept the file extension of path, or None."""
+    for method in _METHODS.values():
+        if method.supports(path):
+            return method.category
+    return None
+
+# ----------------- Detect -----------------
+SCANNERS = {"Image": "scan_image", "Audio": "scan_audio"}
+# Longest message (bytes) Detect looks for; a random header claiming more is
+# rejected before any payload bits are read
+DETECT_MAX_LENGTH = 64 * 1024
+
+def scan(category, path, progress=None, max_length=None):
+    """Ranked candidates from trying every method/plane of a carrier at once (Image and Audio)."""
+    if category not in SCANNERS:
+        raise ValueError(f"Detect supports {' and '.join(SCANNERS)} carriers")
+    return getattr(load(category), SCANNERS[category])(path, max_length=max_length, progress=progress)
+
+# ----------------- Adapters -----------------
+# Text codecs work on text streams and DeEgger is a manual tool, so they get
+# path-based wrappers with the common hide/extract signature. `wraps` names
+# the module function behind a wrapper.
+def _text_hide(iter_name):
+    def hide(carrier, message, output_path, progress=None, compress=True):
+        iter_hide = getattr(load("Text"), iter_name)
+        size = max(1, os.path.getsize(carrier))
+        with open(carrier, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as dst:
+            with span("stream"):
+                written = 0
+                for piece in iter_hide(src, message, compress=compress):
+                    dst.write(piece)
+                    written += len(piece)
+                    if progress:
+                        progress(min(0.99, written / size))
+        if progress:
+            progress(1.0)
+        return output_path
+    hide.wraps = iter_name
+    return hide
+
+def _text_extract(extract_name):
+    def extract(carrier, progress=None):
+        # The extractors read the file lazily and stop at the terminator
+        with open(carrier, "r", encoding="utf-8") as f:
+            message = getattr(load("Text"), extract_name)(f)
+        if progress:
+            progress(1.0)
+        return message
+    extract.wraps = extract_name
+    return extract
+
+def _deegger_hide(carrier, message, output_path=None, progress=None):
+    video_stego = load("Video")
+    return video_stego.hide_video_deegger(carrier, message, lnk_path=video_stego.DEEGGER_LNK_PATH)
+
+def _deegger_extract(carrier, progress=None):
+    # carrier is the .txt that DeEgger extracted
+    return load("Video").extract_video_deegger(carrier)
+
+def _video_output_ext():
+    return load("Video").default_output_ext()
+
+def _channel_detail(method_name):
+    def detail(carrier, k=2):
+        info = load("Audio").channel_capacity(carrier, method_name, k=k)
+        return f"{info['channels']} ch x {info['bytes_per_channel']:,}"
+    return detail
+
+def _pipeline_stats(info):
+    return (f"{info['frames']} frames in {info['seconds']:.2f} s ({info['frames_per_second']:.1f} fps, "
+            f"{info['workers']} workers; read {info['read_seconds']:.2f} s, "
+            f"embed {info['embed_seconds']:.2f} s, write {info['write_seconds']:.2f} s)")
+
+# ----------------- Built-in methods -----------------
+IMAGE_FORMATS = (".png", ".bmp", ".tif", ".tiff", ".jpg", ".jpeg")
+AUDIO_FORMATS = (".wav",)
+TEXT_FORMATS = (".txt",)
+VIDEO_FORMATS = (".y4m", ".mkv", ".mp4", ".avi", ".mov")
+
+PLANE = Param("plane", 1, 0, 7, "Bit Plane (0-7):")
+K = Param("k", 2, 1, 4, "Bits per value (1-4):")
+DELAY = Param("delay_samples", 120, 1, None, "Echo Delay (samples):")
+
+for _name, _hide, _extract, _params in (
+        ("LSB", "hide_lsb_image", "extract_lsb_image", ()),
+        ("kLSB", "hide_klsb_image", "extract_klsb_image", (K,)),
+        ("Parity", "hide_parity_image", "extract_parity_image", ()),
+        ("BitPlane", "hide_bitplane_image", "extract_bitplane_image", (PLANE,))):
+    register(Method("Image", _name, _hide, _extract, _params, IMAGE_FORMATS, ".png"))
+
+# LSB, Parity and k-LSB prefer patching the payload samples of a copy of
+# the WAV through a memmap when its data chunk can be located; otherwise LSB
+# and Parity stream the file block by block. mmap is not always quicker
+# (streaming beats it by about 10% on a 10-minute carrier) but only touches
+# the payload region and keeps the file's other chunks byte for byte.
+register(Method("Audio", "LSB", "hide_audio_lsb_stream", "extract_audio_lsb", (), AUDIO_FORMATS, ".wav",
+                preferred=[Backend("mmap", "hide_audio_lsb_mmap", "mmap_supported")],
+                detail=_channel_detail("LSB")))
+register(Method("Audio", "kLSB", "hide_audio_klsb", "extract_audio_klsb", (K,), AUDIO_FORMATS, ".wav",
+                preferred=[Backend("mmap", "hide_audio_klsb_mmap", "mmap_supported")],
+                detail=_channel_detail("kLSB")))
+register(Method("Audio", "Parity", "hide_audio_parity_stream", "extract_audio_parity", (), AUDIO_FORMATS, ".wav",
+                preferred=[Backend("mmap", "hide_audio_parity_mmap", "mmap_supported")],
+                detail=_channel_detail("Parity")))
+register(Method("Audio", "Phase", "hide_audio_phase", "extract_audio_phase", (), AUDIO_FORMATS, ".wav"))
+register(Method("Audio", "Echo", "hide_audio_echo_stream", "extract_audio_echo_stream", (DELAY,), AUDIO_FORMATS,
+                ".wav"))
+
+register(Method("Text", "ZW", _text_hide("iter_hide_zw"), _text_extract("extract_zw"), (), TEXT_FORMATS, ".txt"))
+register(Method("Text", "Parity", _text_hide("iter_hide_parity_text"), _text_extract("extract_parity_text"), (),
+                TEXT_FORMATS, ".txt"))
+register(Method("Text", "Whitespace", _text_hide("iter_hide_whitespace"), _text_extract("extract_whitespace"), (),
+                TEXT_FORMATS, ".txt"))
+
+register(Method("Video", "FrameLSB", "hide_video_lsb", "extract_video_lsb", (), VIDEO_FORMATS, _video_output_ext,
+                stats=_pipeline_stats))
+register(Method("Video", "DeEgger", _deegger_hide, _deegger_extract, (), VIDEO_FORMATS, capacity=False,
+                manual=True))
@@ -1,103 +1,223 @@
 # text_stego.py
+import itertools
+import os
+import re
+
+from categories import payload
+from categories.trace import span
+
 ZWSP = '\u200b'
 ZWNJ = '\u200c'
 
+# Covers are processed in chunks of CHUNK_SIZE characters; every codec
+# accepts either a str or a file-like object opened in text mode.
+CHUNK_SIZE = 1 << 16
+
+def _payload_bits(message, compress=True):
+    with span("encode"):
+        frame = payload.pack(message.encode('utf-8'), compress)
+        return format(int.from_bytes(frame, 'big'), f'0{len(frame) * 8}b')
+
+def _chunks(source, chunk_size=CHUNK_SIZE):
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    else:
+        yield from iter(lambda: source.read(chunk_size), '')
+
+def _lines(source):
+    return source.splitlines(True) if isinstance(source, str) else source
+
 # ---------------- Zero-Width (ZW) ----------------
-def hide_zw(cover_text, message):
-    message += "\0"
-    bits = ''.join(format(ord(c), '08b') for c in message)
-    result = list(cover_text)
-    insert_pos = 0
-    for bit in bits:
-        while insert_pos < len(result) and result[insert_pos] == ' ':
-            insert_pos += 1
-        if insert_pos >= len(result):
-            raise ValueError("Cover text too short")
-        zw = ZWSP if bit == '1' else ZWNJ
-        result.insert(insert_pos+1, zw)
-        insert_pos += 2
-    return ''.join(result)
-
-def extract_zw(text):
-    bits = []
-    for ch in text:
-        if ch == ZWSP:
-            bits.append('1')
-        elif ch == ZWNJ:
-            bits.append('0')
-        if len(bits) % 8 == 0 and len(bits) > 0:
-            byte = ''.join(bits[-8:])
-            c = chr(int(byte, 2))
-            if c == '\0':
-                whole = ''.join(chr(int(''.join(bits[i:i+8]), 2)) for i in range(0, len(bits)-8, 8))
-                return whole
-    return ''
+# Each payload bit is a zero-width mark placed right after the next non-space
+# character of the cover (ZWSP = 1, ZWNJ = 0).
+_ZW_MARKS = str.maketrans({'1': ZWSP, '0': ZWNJ})
+_ZW_BITS = str.maketrans({ZWSP: '1', ZWNJ: '0'})
+_NOT_ZW = re.compile('[^' + ZWSP + ZWNJ + ']+')
+_NOT_SPACE = re.compile('[^ ]')
+
+def iter_hide_zw(cover, message, chunk_size=CHUNK_SIZE, compress=True):
+    """Yield the stego text chunk by chunk; cover is a str or a text file object."""
+    marks = _payload_bits(message, compress).translate(_ZW_MARKS)
+    used = 0
+    for chunk in _chunks(cover, chunk_size):
+        if used >= len(marks):
+            yield chunk
+            continue
+        pieces = []
+        last = 0
+        for match in _NOT_SPACE.finditer(chunk):
+            pieces.append(chunk[last:match.end()])
+            pieces.append(marks[used])
+            last = match.end()
+            used += 1
+            if used >= len(marks):
+                break
+        pieces.append(chunk[last:])
+        yield ''.join(pieces)
+    if used < len(marks):
+        raise ValueError("Cover text too short")
+
+def hide_zw(cover_text, message, compress=True):
+    with span("embed"):
+        return ''.join(iter_hide_zw(cover_text, message, compress=compress))
+
+def _iter_zw_bits(chunks):
+    for chunk in chunks:
+        yield _NOT_ZW.sub('', chunk).translate(_ZW_BITS)
+
+def extract_zw(text, chunk_size=CHUNK_SIZE):
+    # Filtering chunk by chunk lets scanning stop at the terminator
+    with span("decode"):
+        return payload.decode_bit_string(_iter_zw_bits(_chunks(text, chunk_size)))
 
 # ---------------- Parity-based ----------------
-def hide_parity_text(cover_text, message):
-    message += "\0"
-    bits = ''.join(format(ord(c), '08b') for c in message)
-    result = ''
+# After the n-th separator (space or newline) a ZWSP is added whenever
+# n % 2 differs from the payload bit.
+_SEPARATOR = re.compile('[ \n]')
+_MARKED_SEPARATOR = re.compile('[ \n]' + ZWSP + '?')
+
+def iter_hide_parity_text(cover, message, chunk_size=CHUNK_SIZE, compress=True):
+    """Yield the stego text chunk by chunk; cover is a str or a text file object."""
+    bits = _payload_bits(message, compress)
     bit_index = 0
     word_count = 0
-    for ch in cover_text:
-        result += ch
-        if ch in ' \n' and bit_index < len(bits):
+    for chunk in _chunks(cover, chunk_size):
+        if bit_index >= len(bits):
+            yield chunk
+            continue
+        pieces = []
+        last = 0
+        for match in _SEPARATOR.finditer(chunk):
             word_count += 1
-            parity = word_count % 2
-            if parity != int(bits[bit_index]):
-                result += ZWSP
+            if word_count % 2 != int(bits[bit_index]):
+                pieces.append(chunk[last:match.end()])
+                pieces.append(ZWSP)
+                last = match.end()
             bit_index += 1
+            if bit_index >= len(bits):
+                break
+        pieces.append(chunk[last:])
+        yield ''.join(pieces)
     if bit_index < len(bits):
         raise ValueError("Cover text too short")
-    return result
 
-def extract_parity_text(text):
-    bits = ''
+def _iter_parity_bits(chunks):
     word_count = 0
-    i = 0
-    while i < len(text):
-        if text[i] in ' \n':
+    pending = None  # separator at the very end of the previous chunk
+    for chunk in chunks:
+        bits = []
+        if pending is not None:
+            if chunk.startswith(ZWSP):
+                pending ^= 1
+                chunk = chunk[1:]
+            bits.append(pending)
+            pending = None
+        for match in _MARKED_SEPARATOR.finditer(chunk):
             word_count += 1
             parity = word_count % 2
-            if i + 1 < len(text) and text[i+1] == ZWSP:
-                parity = 1 - parity
-                i += 1
-            bits += str(parity)
-            if len(bits) % 8 == 0:
-                c = chr(int(bits[-8:], 2))
-                if c == '\0':
-                    return ''.join(chr(int(bits[j:j+8], 2)) for j in range(0, len(bits)-8, 8))
-        i += 1
-    return ''
+            if match.end() - match.start() == 2:
+                parity ^= 1
+            elif match.end() == len(chunk):
+                pending = parity
+                continue
+            bits.append(parity)
+        yield ''.join('1' if b else '0' for b in bits)
+    if pending is not None:
+        yield str(pending)
+
+def hide_parity_text(cover_text, message, compress=True):
+    with span("embed"):
+        return ''.join(iter_hide_parity_text(cover_text, message, compress=compress))
+
+def extract_parity_text(text, chunk_size=CHUNK_SIZE):
+    with span("decode"):
+        return payload.decode_bit_string(_iter_parity_bits(_chunks(text, chunk_size)))
 
 # ---------------- Whitespace-based ----------------
-def hide_whitespace(cover_text, message):
-    message += "\0"
-    bits = ''.join(format(ord(c), '08b') for c in message)
-    lines = cover_text.splitlines(True)
-    if len(bits) > len(lines):
-        raise ValueError("Not enough lines in cover text")
-    out = ''
-    for i, line in enumerate(lines):
-        if i < len(bits):
-            out += line.rstrip('\n')
-            out += ('\t' if bits[i] == '1' else ' ')
-            out += '\n' if line.endswith('\n') else ''
-        else:
-            out += line
-    return out
+# Line i (for each payload bit i) gets a trailing tab for 1 or space for 0.
+def iter_hide_whitespace(cover, message, compress=True):
+    """Yield the stego text line by line; cover is a str or a text file object."""
+    bits = _payload_bits(message, compress)
+    lines = iter(_lines(cover))
+    for bit in bits:
+        line = next(lines, None)
+        if line is None:
+            raise ValueError("Not enough lines in cover text")
+        body = line.rstrip('\r\n')
+        yield body + ('\t' if bit == '1' else ' ') + line[len(body):]
+    yield from lines
+
+def _iter_whitespace_bits(lines, batch=4096):
+    lines = iter(lines)
+    while True:
+        block = list(itertools.islice(lines, batch))
+        if not block:
+            return
+        bits = []
+        for line in block:
+            line = line.rstrip('\r\n')
+            if line.endswith('\t'):
+                bits.append('1')
+            elif line.endswith(' '):
+                bits.append('0')
+        yield ''.join(bits)
+
+def hide_whitespace(cover_text, message, compress=True):
+    with span("embed"):
+        return ''.join(iter_hide_whitespace(cover_text, message, compress))
 
 def extract_whitespace(text):
-    lines = text.splitlines()
-    bits = ''
-    for line in lines:
-        if line.endswith('\t'):
-            bits += '1'
-        elif line.endswith(' '):
-            bits += '0'
-        if len(bits) % 8 == 0 and len(bits) > 0:
-            c = chr(int(bits[-8:], 2))
-            if c == '\0':
-                return ''.join(chr(int(bits[i:i+8], 2)) for i in range(0, len(bits)-8, 8))
-    return ''
+    with span("decode"):
+        return payload.decode_bit_string(_iter_whitespace_bits(text.splitlines() if isinstance(text, str) else text))
+
+# ---------------- Streaming over file handles ----------------
+# hide_*_stream copy reader -> writer chunk by chunk (text file objects, e.g.
+# sys.stdin / sys.stdout). The extractors already accept a reader and stop
+# reading once the terminator has been decoded. Reading, marking and writing
+# interleave, so they share one "stream" span.
+def _write_all(pieces, writer):
+    with span("stream"):
+        for piece in pieces:
+            writer.write(piece)
+
+def hide_zw_stream(reader, writer, message, chunk_size=CHUNK_SIZE, compress=True):
+    _write_all(iter_hide_zw(reader, message, chunk_size, compress), writer)
+
+def hide_parity_text_stream(reader, writer, message, chunk_size=CHUNK_SIZE, compress=True):
+    _write_all(iter_hide_parity_text(reader, message, chunk_size, compress), writer)
+
+def hide_whitespace_stream(reader, writer, message, compress=True):
+    _write_all(iter_hide_whitespace(reader, message, compress), writer)
+
+extract_zw_stream = extract_zw
+extract_parity_text_stream = extract_parity_text
+extract_whitespace_stream = extract_whitespace
+
+# ---------------- Capacity ----------------
+def capacity(source, method="ZW", **params):
+    """Max message size in UTF-8 bytes for method.
+
+    source is a path or a text file object; the cover is counted chunk by
+    chunk (non-space characters, separators or lines) without building any
+    stego text.
+    """
+    if method not in ("ZW", "Parity", "Whitespace"):
+        raise ValueError(f"Unknown text method: {method}")
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as f:
+            return capacity(f, method)
+    slots = 0
+    last = ''
+    for chunk in _chunks(source):
+        if method == "ZW":
+            slots += len(chunk) - chunk.count(' ')
+        elif method == "Parity":
+            slots += chunk.count(' ') + chunk.count('\n')
+        else:
+            slots += chunk.count('\n')
+        last = chunk[-1]
+    if method == "Whitespace" and last and last != '\n':
+        slots += 1
+    # One bit per slot; assumes an uncompressed frame
+    return max(0, slots // 8 - payload.OVERHEAD)
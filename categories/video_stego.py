@@ -1,7 +1,447 @@
 # video_stego.py
 import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from fractions import Fraction
 from pathlib import Path
 
+import numpy as np
+
+from categories.bitcodec import message_to_bytes, embed_plane, read_plane
+from categories import payload
+from categories.trace import span
+
+# ---------------- Y4M frames ----------------
+# Frames travel as YUV4MPEG2 (8-bit planar YUV): .y4m files are read and
+# written directly, anything else is decoded and encoded by a local ffmpeg
+# through a pipe (FFV1 in Matroska, lossless, for the output). Only one
+# frame is in memory at a time.
+Y4M_MAGIC = b"YUV4MPEG2"
+FRAME_TAG = b"FRAME\n"
+
+def _frame_size(width, height, colorspace):
+    if colorspace == "mono":
+        return width * height
+    if colorspace in ("420", "420jpeg", "420paldv", "420mpeg2"):
+        chroma = -(-width // 2) * -(-height // 2)
+    elif colorspace == "422":
+        chroma = -(-width // 2) * height
+    elif colorspace == "411":
+        chroma = -(-width // 4) * height
+    elif colorspace == "444":
+        chroma = width * height
+    elif colorspace == "444alpha":
+        return 4 * width * height
+    else:
+        raise ValueError(f"Unsupported Y4M colorspace: C{colorspace} (only 8-bit formats are supported)")
+    return width * height + 2 * chroma
+
+class Y4MReader:
+    """Iterate the frames of a YUV4MPEG2 byte stream as writable bytearrays."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.header = stream.readline()
+        if not self.header.startswith(Y4M_MAGIC):
+            raise ValueError("Not a YUV4MPEG2 stream")
+        params = {token[:1]: token[1:] for token in self.header.split()[1:]}
+        self.width = int(params[b"W"])
+        self.height = int(params[b"H"])
+        self.colorspace = params.get(b"C", b"420jpeg").decode("ascii")
+        self.frame_size = _frame_size(self.width, self.height, self.colorspace)
+
+    def __iter__(self):
+        while True:
+            line = self.stream.readline()
+            if not line:
+                return
+            if not line.startswith(b"FRAME"):
+                raise ValueError("Corrupt Y4M stream: expected a FRAME header")
+            frame = bytearray(self.frame_size)
+            view = memoryview(frame)
+            filled = 0
+            while filled < self.frame_size:
+                n = self.stream.readinto(view[filled:])
+                if not n:
+                    raise ValueError("Truncated Y4M frame")
+                filled += n
+            yield frame
+
+class Y4MWriter:
+    def __init__(self, stream, header):
+        self.stream = stream
+        stream.write(header)
+
+    def write(self, frame):
+        self.stream.write(FRAME_TAG)
+        self.stream.write(frame)
+
+def _ffmpeg(tool="ffmpeg"):
+    path = shutil.which(tool)
+    if path is None:
+        raise RuntimeError(f"{tool} not found: install it or use .y4m video")
+    return path
+
+def _is_y4m(video_path):
+    with open(video_path, "rb") as f:
+        return f.read(len(Y4M_MAGIC)) == Y4M_MAGIC
+
+@contextmanager
+def open_frames(video_path, pix_fmt="yuv420p"):
+    """Yield a Y4MReader over the first video stream of video_path."""
+    if not os.path.exists(video_path):
+        raise FileNotFoundError("Video path not found")
+    if _is_y4m(video_path):
+        with open(video_path, "rb") as f:
+            yield Y4MReader(f)
+        return
+    proc = subprocess.Popen([_ffmpeg(), "-v", "error", "-i", video_path, "-map", "0:v:0", "-pix_fmt", pix_fmt,
+                             "-f", "yuv4mpeg2", "-"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        try:
+            reader = Y4MReader(proc.stdout)
+        except ValueError:
+            proc.wait()
+            raise RuntimeError(f"ffmpeg could not decode {video_path}: {proc.stderr.read().decode(errors='replace').strip()}")
+        yield reader
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            # Stopped reading before the end (e.g. extraction is done)
+            proc.kill()
+        proc.wait()
+        proc.stderr.close()
+
+@contextmanager
+def open_frame_writer(output_path, header):
+    """Yield a Y4MWriter that writes .y4m directly, or FFV1 through ffmpeg for any other extension."""
+    if output_path.lower().endswith(".y4m"):
+        with open(output_path, "wb") as f:
+            yield Y4MWriter(f, header)
+        return
+    proc = subprocess.Popen([_ffmpeg(), "-v", "error", "-y", "-f", "yuv4mpeg2", "-i", "-",
+                             "-c:v", "ffv1", "-level", "3", output_path],
+                            stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        yield Y4MWriter(proc.stdin, header)
+        proc.stdin.close()
+        error = proc.stderr.read().decode(errors="replace").strip()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg could not encode {output_path}: {error}")
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    finally:
+        proc.stderr.close()
+
+def default_output_ext():
+    """.mkv (FFV1) when ffmpeg is available, raw .y4m otherwise."""
+    return ".mkv" if shutil.which("ffmpeg") else ".y4m"
+
+# ---------------- Frame LSB ----------------
+# The payload frame goes into the LSB of every Y/U/V byte, filling one
+# video frame after the other, so only as many frames as the payload needs
+# are modified; the rest are copied through.
+def _estimated_frames(video_path, reader):
+    """Frame count of a .y4m file from its size (frames without parameters), or None."""
+    if not _is_y4m(video_path):
+        return None
+    body = os.path.getsize(video_path) - len(reader.header)
+    return body // (len(FRAME_TAG) + reader.frame_size)
+
+class _PayloadBits:
+    """take(n) -> the next (up to) n payload bits from an iterable of frame byte blocks."""
+
+    def __init__(self, blocks):
+        self.blocks = iter(blocks)
+        self.bits = np.empty(0, dtype=np.uint8)
+
+    def take(self, count):
+        pieces = [self.bits]
+        available = self.bits.size
+        while available < count:
+            block = next(self.blocks, None)
+            if block is None:
+                break
+            bits = np.unpackbits(np.frombuffer(block, dtype=np.uint8))
+            pieces.append(bits)
+            available += bits.size
+        bits = np.concatenate(pieces) if len(pieces) > 1 else self.bits
+        self.bits = bits[count:]
+        return bits[:count]
+
+    def exhausted(self):
+        return not self.bits.size and next(self.blocks, None) is None
+
+# ---------------- Pipeline ----------------
+# Embedding runs as three stages: a reader thread decodes frames and pairs
+# each with its slice of payload bits, a pool of worker threads runs
+# embed_plane on them (NumPy releases the GIL for the bit operations), and
+# the calling thread writes frames back in order. At most
+# queue_frames + workers frames are in flight, so a slow writer holds the
+# reader back instead of buffering the video. Every frame gets a read, embed
+# and write span on the thread that ran the stage.
+PIPELINE_QUEUE_FRAMES = 8
+_END = object()
+
+def _default_workers():
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+def _pipeline(frames, bits, write, workers, queue_frames, progress=None):
+    """Run frames through read -> embed -> ordered write; returns timing stats."""
+    work = queue.Queue(maxsize=queue_frames)
+    done = queue.Queue()
+    slots = threading.Semaphore(queue_frames + workers)
+    stop = threading.Event()
+    errors = []
+    timing = {"read_seconds": 0.0, "embed_seconds": 0.0, "write_seconds": 0.0}
+    lock = threading.Lock()
+
+    def wait(acquire):
+        # Block on a queue or semaphore, but give up once another stage failed
+        while not stop.is_set():
+            try:
+                return acquire()
+            except (queue.Full, queue.Empty):
+                pass
+        return _END
+
+    def read_stage():
+        try:
+            index = 0
+            frames_iter = iter(frames)
+            while True:
+                start = time.perf_counter()
+                with span("read", frame=index):
+                    frame = next(frames_iter, None)
+                    chunk = None if frame is None else bits.take(len(frame))
+                timing["read_seconds"] += time.perf_counter() - start
+                if frame is None:
+                    break
+                while not slots.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if wait(lambda: work.put((index, frame, chunk), timeout=0.1)) is _END:
+                    return
+                index += 1
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            for _ in range(workers):
+                if wait(lambda: work.put(_END, timeout=0.1)) is _END:
+                    break
+
+    def embed_stage():
+        try:
+            while True:
+                item = wait(lambda: work.get(timeout=0.1))
+                if item is _END:
+                    break
+                index, frame, chunk = item
+                if chunk.size:
+                    start = time.perf_counter()
+                    with span("embed", frame=index):
+                        embed_plane(np.frombuffer(frame, dtype=np.uint8), chunk, 0)
+                    with lock:
+                        timing["embed_seconds"] += time.perf_counter() - start
+                done.put((index, frame))
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            done.put(_END)
+
+    threads = [threading.Thread(target=read_stage, daemon=True)]
+    threads += [threading.Thread(target=embed_stage, daemon=True) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    written = 0
+    finished = 0
+    waiting = {}
+    try:
+        while finished < workers:
+            item = wait(lambda: done.get(timeout=0.1))
+            if item is _END:
+                if stop.is_set():
+                    break
+                finished += 1
+                continue
+            waiting[item[0]] = item[1]
+            while written in waiting:
+                write_start = time.perf_counter()
+                with span("write", frame=written):
+                    write(waiting.pop(written))
+                timing["write_seconds"] += time.perf_counter() - write_start
+                written += 1
+                slots.release()
+                if progress:
+                    progress(written)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    seconds = time.perf_counter() - start
+    timing.update(frames=written, workers=workers, seconds=seconds,
+                  frames_per_second=written / seconds if seconds > 0 else 0.0)
+    return timing
+
+def _embed_frames(video_path, blocks, output_path, progress=None, workers=None, queue_frames=PIPELINE_QUEUE_FRAMES):
+    bits = _PayloadBits(blocks)
+    workers = workers or _default_workers()
+    with open_frames(video_path) as reader, open_frame_writer(output_path, reader.header) as writer:
+        total = _estimated_frames(video_path, reader)
+        report = (lambda written: progress(min(1.0, written / total))) if progress and total else None
+        stats = _pipeline(reader, bits, writer.write, workers, queue_frames, report)
+        if not bits.exhausted():
+            raise ValueError("Message too large for video")
+    if progress:
+        progress(1.0)
+    return stats
+
+def _hide(video_path, blocks, output_path, progress=None, workers=None, stats=None):
+    if not os.path.exists(video_path):
+        raise FileNotFoundError("Video path not found")
+    if os.path.abspath(output_path) == os.path.abspath(video_path):
+        raise ValueError("Output must differ from the input video")
+    try:
+        result = _embed_frames(video_path, blocks, output_path, progress, workers)
+        if stats is not None:
+            stats.update(result)
+        return output_path
+    except BaseException:
+        # Do not leave a half-written video behind, whatever stopped the
+        # pipeline (capacity, cancel from the progress callback, ffmpeg)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+
+def hide_video_lsb(video_path, message, output_path, progress=None, workers=None, stats=None, compress=True):
+    """Embed through the frame pipeline; a stats dict, if given, receives frames,
+    seconds, frames_per_second and per-stage read/embed/write seconds."""
+    with span("encode"):
+        frame = message_to_bytes(message, compress)
+    return _hide(video_path, [frame], output_path, progress, workers, stats)
+
+def hide_bytes(video_path, data, output_path, progress=None, workers=None, stats=None):
+    """Hide bytes or a binary file object; the payload is streamed into the frames block by block."""
+    return _hide(video_path, payload.iter_pack(data), output_path, progress, workers, stats)
+
+class _FrameBits:
+    """read(n) -> the next n payload bytes from the LSBs of a frame iterator, decoding frames lazily."""
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+        self.bits = np.empty(0, dtype=np.uint8)
+
+    def read(self, count):
+        pieces = [self.bits]
+        available = self.bits.size
+        while available < count * 8:
+            frame = next(self.frames, None)
+            if frame is None:
+                break
+            bits = read_plane(np.frombuffer(frame, dtype=np.uint8), 0)
+            pieces.append(bits)
+            available += bits.size
+        bits = np.concatenate(pieces)
+        n = min(count * 8, bits.size - bits.size % 8)
+        self.bits = bits[n:]
+        return np.packbits(bits[:n]).tobytes()
+
+def _extract_frames(video_path, sink=None):
+    with open_frames(video_path) as reader, span("decode"):
+        source = _FrameBits(reader)
+        if sink is not None:
+            try:
+                return payload.unpack_stream(source.read, sink)
+            except payload.PayloadError:
+                return None
+        head = source.read(payload.HEADER_SIZE)
+        size = payload.parse_header(head)
+        if size is None:
+            return None
+        try:
+            return payload.unpack(head + source.read(size - payload.HEADER_SIZE))
+        except payload.PayloadError:
+            return None
+
+def extract_video_lsb(video_path, progress=None):
+    """Read frames only until the payload is complete."""
+    data = _extract_frames(video_path)
+    if progress:
+        progress(1.0)
+    return "" if data is None else data.decode("utf-8", errors="replace")
+
+def extract_bytes(video_path, sink=None, progress=None):
+    """Hidden payload as bytes, or written to sink.write (returns the byte count); None if there is none."""
+    result = _extract_frames(video_path, sink)
+    if progress:
+        progress(1.0)
+    return result
+
+# ---------------- Capacity ----------------
+def _ffprobe(video_path, *args):
+    out = subprocess.run([_ffmpeg("ffprobe"), "-v", "error", "-select_streams", "v:0", *args, "-of",
+                          "default=noprint_wrappers=1", video_path], capture_output=True, text=True, check=True).stdout
+    info = {}
+    # Stream entries come before format ones; the first known value wins
+    for line in out.splitlines():
+        key, _, value = line.partition("=")
+        if value and value != "N/A":
+            info.setdefault(key, value)
+    return info
+
+def _positive(value, parse=int):
+    try:
+        value = parse(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return value if value > 0 else None
+
+def _probe(video_path):
+    """(width, height, frame count) of the first video stream, via ffprobe.
+
+    The count is the container's nb_frames, or duration x frame rate, both
+    read from the headers; only when neither is known are the packets
+    counted, which demuxes the whole file.
+    """
+    info = _ffprobe(video_path, "-show_entries", "stream=width,height,nb_frames,avg_frame_rate,duration:format=duration")
+    frames = _positive(info.get("nb_frames"))
+    if frames is None:
+        rate = _positive(info.get("avg_frame_rate"), Fraction)
+        duration = _positive(info.get("duration"), Fraction)
+        if rate and duration:
+            frames = int(duration * rate)
+    if not frames:
+        info = _ffprobe(video_path, "-count_packets", "-show_entries", "stream=width,height,nb_read_packets")
+        frames = int(info["nb_read_packets"])
+    return int(info["width"]), int(info["height"]), frames
+
+def capacity(video_path, method="FrameLSB", **params):
+    """Max message size in UTF-8 bytes; .y4m is measured from its header and size, other formats via ffprobe."""
+    if method != "FrameLSB":
+        raise ValueError(f"No capacity for video method: {method}")
+    if not os.path.exists(video_path):
+        raise FileNotFoundError("Video path not found")
+    if _is_y4m(video_path):
+        with open(video_path, "rb") as f:
+            reader = Y4MReader(f)
+        bits = _estimated_frames(video_path, reader) * reader.frame_size
+    else:
+        width, height, frames = _probe(video_path)
+        bits = frames * _frame_size(width, height, "420")
+    return max(0, bits // 8 - payload.OVERHEAD)
+
+# ---------------- DeEgger (Windows, manual) ----------------
 
 DEEGGER_LNK_PATH = r"C:\Program Files (x86)\ZASI\DeEgger Embedder\DeEgger Embedder.exe"
 
@@ -3,18 +3,21 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
+import threading
 import webbrowser
 import platform
-import categories.image_stego as image_stego
-import categories.audio_stego as audio_stego
-import categories.text_stego as text_stego
-import categories.video_stego as video_stego
+from concurrent.futures import ThreadPoolExecutor
+# Methods come from the registry; their codec modules (and NumPy / Pillow
+# behind them) are imported the first time a method, capacity or scan
+# needs them, not at startup
+from categories import registry, trace
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-# Change these if your shortcuts are in different paths
-DEEGGER_LNK_PATH = video_stego.DEEGGER_LNK_PATH
+class OperationCancelled(Exception):
+    """Raised from the progress callback to stop a running hide/extract."""
+
 class AdvancedStegoGUI:
     def __init__(self, root):
         self.root = root
@@ -29,17 +32,20 @@ class AdvancedStegoGUI:
         self.root.minsize(900, 600)
 
         # Internal state
-        self.category_methods = {
-            "Image": ["LSB", "Parity", "BitPlane"],
-            "Audio": ["LSB", "Parity", "Phase", "Echo"],
-            "Text": ["ZW", "Parity", "Whitespace"],
-            "Video": ["DeEgger Hide", "DeEgger Extract"],
-        }
+        self.category_methods = {cat: [m.name for m in registry.methods(cat)] for cat in registry.categories()}
         self.current_file = None
         self.output_dir = os.path.join(os.getcwd(), "Output")
         os.makedirs(self.output_dir, exist_ok=True)
 
+        # Background job state
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.cancel_event = threading.Event()
+        self.job = None
+        self.job_done = None
+        self.job_progress = 0.0
+
         self.build_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def build_ui(self):
         # Root layout: Top header, control row, center area
@@ -84,21 +90,27 @@ class AdvancedStegoGUI:
         # Shared message field (large)
         ctk.CTkLabel(left, text="Message (hide/extract)", anchor="w").pack(anchor="w", padx=8, pady=(8,4))
         self.msg_text = ctk.CTkTextbox(left, width=600, height=220, corner_radius=8, fg_color="#0B1220")
-        self.msg_text.pack(fill="x", padx=8, pady=(0,12))
+        self.msg_text.pack(fill="x", padx=8, pady=(0,4))
+        self.msg_text.bind("<KeyRelease>", self.update_capacity)
+        self.capacity_label = ctk.CTkLabel(left, text="Capacity: select a carrier", anchor="w")
+        self.capacity_label.pack(anchor="w", padx=8, pady=(0,8))
+        self._capacity_key = None
+        self._capacity = None
+        self._capacity_detail = ""
 
         # Per-method parameters area (dynamically shown)
         ctk.CTkLabel(left, text="Method Parameters", anchor="w").pack(anchor="w", padx=8, pady=(4,4))
         self.params_frame = ctk.CTkFrame(left, fg_color="#071018")
         self.params_frame.pack(fill="x", padx=8, pady=(0,12))
 
-        # Default parameter widgets (hidden/shown dynamically)
-        # Bit plane (integer)
-        self.plane_var = tk.IntVar(value=1)
-        self.plane_widget = None
-
-        # Echo delay
-        self.echo_delay_var = tk.IntVar(value=120)
-        self.echo_widget = None
+        # One variable per parameter name (plane, k, delay_samples), shared by
+        # the methods that take it; the entries are shown dynamically
+        self.param_vars = {}
+        for method in registry.methods():
+            for param in method.params:
+                if param.name not in self.param_vars:
+                    self.param_vars[param.name] = tk.IntVar(value=param.default)
+                    self.param_vars[param.name].trace_add("write", self.update_capacity)
 
         # Buttons: Hide / Extract
         btns = ctk.CTkFrame(left)
@@ -107,6 +119,13 @@ class AdvancedStegoGUI:
         self.hide_btn.pack(side="left", padx=8, pady=6)
         self.extract_btn = ctk.CTkButton(btns, text="Extract", fg_color="#FFC107", hover_color="#FFDB58", text_color="#111", command=self.on_extract)
         self.extract_btn.pack(side="left", padx=8, pady=6)
+        self.detect_btn = ctk.CTkButton(btns, text="Detect", fg_color="#6F42C1", hover_color="#8A63D2", command=self.on_detect)
+        self.detect_btn.pack(side="left", padx=8, pady=6)
+        self.cancel_btn = ctk.CTkButton(btns, text="Cancel", fg_color="#DC3545", hover_color="#E4606D", command=self.cancel_job, state="disabled")
+        self.cancel_btn.pack(side="left", padx=8, pady=6)
+        self.progress_bar = ctk.CTkProgressBar(btns)
+        self.progress_bar.pack(side="left", fill="x", expand=True, padx=8, pady=6)
+        self.progress_bar.set(0)
 
         # Right panel: Info & Tools
         ctk.CTkLabel(right, text="Info & Tools", anchor="w").pack(anchor="w", padx=8, pady=(8,4))
@@ -146,39 +165,73 @@ class AdvancedStegoGUI:
         # refresh params
         self.on_method_change(self.method_var.get())
 
+    def selected_method(self):
+        return registry.get(self.category_var.get(), self.method_var.get())
+
+    def method_params(self, method, strict=True):
+        """Parameter values from the entries, clamped to their ranges.
+
+        An invalid entry raises tk.TclError/ValueError, or falls back to the
+        default when strict is False.
+        """
+        values = {}
+        for param in method.params:
+            try:
+                values[param.name] = param.clamp(int(self.param_vars[param.name].get()))
+            except (tk.TclError, ValueError):
+                if strict:
+                    raise
+                values[param.name] = param.default
+        return values
+
     def on_method_change(self, method):
         # Clear params frame
         for w in self.params_frame.winfo_children():
             w.destroy()
-        # Show parameters depending on method
-        if method == "BitPlane":
-            ctk.CTkLabel(self.params_frame, text="Bit Plane (0-7):").pack(side="left", padx=8, pady=8)
-            self.plane_widget = ctk.CTkEntry(self.params_frame, width=80, textvariable=self.plane_var)
-            self.plane_widget.pack(side="left", padx=8, pady=8)
-        elif method == "Echo":
-            ctk.CTkLabel(self.params_frame, text="Echo Delay (samples):").pack(side="left", padx=8, pady=8)
-            self.echo_widget = ctk.CTkEntry(self.params_frame, width=120, textvariable=self.echo_delay_var)
-            self.echo_widget.pack(side="left", padx=8, pady=8)
-        else:
-            # no params
+        # Show the parameters the method declares
+        params = self.selected_method().params
+        for param in params:
+            ctk.CTkLabel(self.params_frame, text=param.label).pack(side="left", padx=8, pady=8)
+            ctk.CTkEntry(self.params_frame, width=100, textvariable=self.param_vars[param.name]).pack(side="left", padx=8, pady=8)
+        if not params:
             ctk.CTkLabel(self.params_frame, text="(No parameters for this method)").pack(anchor="w", padx=8, pady=8)
+        self.update_capacity()
 
     def select_file(self):
         cat = self.category_var.get()
-        if cat == "Image":
-            path = filedialog.askopenfilename(filetypes=[("Images", "*.png *.jpg *.jpeg")])
-        elif cat == "Audio":
-            path = filedialog.askopenfilename(filetypes=[("WAV files", "*.wav")])
-        elif cat == "Text":
-            path = filedialog.askopenfilename(filetypes=[("Text", "*.txt")])
-        elif cat == "Video":
-            path = filedialog.askopenfilename(filetypes=[("Videos", "*.mp4 *.avi *.mov")])
-        else:
-            path = filedialog.askopenfilename()
+        patterns = " ".join("*" + ext for ext in self.selected_method().formats)
+        path = filedialog.askopenfilename(filetypes=[(f"{cat} files", patterns)])
         if path:
             self.current_file = path
             self.file_label.configure(text=os.path.basename(path))
             self.log(f"Selected: {path}")
+            self.update_capacity()
+
+    def update_capacity(self, *_):
+        # Header-only capacity of the selected carrier vs the current message
+        method = self.selected_method()
+        if not method.has_capacity:
+            self.capacity_label.configure(text=f"Capacity: n/a for {method.name}", text_color=("gray10", "#DCE4EE"))
+            return
+        if not self.current_file or not os.path.exists(self.current_file):
+            self.capacity_label.configure(text="Capacity: select a carrier", text_color=("gray10", "#DCE4EE"))
+            return
+        params = self.method_params(method, strict=False)
+        key = (self.current_file, os.stat(self.current_file).st_mtime_ns, method, tuple(sorted(params.items())))
+        if key != self._capacity_key:
+            try:
+                self._capacity = method.capacity(self.current_file, **params)
+                detail = method.capacity_detail(self.current_file, **params)
+                self._capacity_detail = f" ({detail})" if detail else ""
+            except Exception as e:
+                self._capacity_key = None
+                self.capacity_label.configure(text=f"Capacity: unavailable ({e})", text_color="#FFC107")
+                return
+            self._capacity_key = key
+        msg = self.get_message_text()
+        used = len(msg.encode("utf-8"))
+        color = "#FF6B6B" if used > self._capacity else "#8FD694"
+        self.capacity_label.configure(text=f"Capacity: {self._capacity:,} bytes{self._capacity_detail} | message: {used:,} bytes", text_color=color)
 
     def get_message_text(self):
         return self.msg_text.get("0.0", "end-1c")
@@ -202,8 +255,10 @@ class AdvancedStegoGUI:
 
     def open_deegger(self):
         try:
-            if os.path.exists(DEEGGER_LNK_PATH):
-                os.startfile(DEEGGER_LNK_PATH)
+            # Change video_stego.DEEGGER_LNK_PATH if your shortcut is elsewhere
+            lnk_path = registry.load("Video").DEEGGER_LNK_PATH
+            if os.path.exists(lnk_path):
+                os.startfile(lnk_path)
                 self.log("Opened DeEgger (shortcut).")
             else:
                 raise FileNotFoundError("DeEgger shortcut not found; update DEEGGER_LNK_PATH in code.")
@@ -216,134 +271,181 @@ class AdvancedStegoGUI:
         self.msg_text.delete("0.0", "end")
         self.log("State reset", clear=True)
 
+    # ----------------- Background jobs -----------------
+    # Hide/extract run on a single worker thread. The worker only touches
+    # plain Python state (job_progress, cancel_event); the Tk side polls it
+    # with root.after and hands the result back on the main thread. Each job
+    # records trace spans, and their per-stage totals are logged when it ends.
+    def start_job(self, title, task, on_done):
+        if self.job is not None:
+            return
+        self.cancel_event.clear()
+        self.job_progress = 0.0
+        self.progress_bar.set(0)
+        self.hide_btn.configure(state="disabled")
+        self.extract_btn.configure(state="disabled")
+        self.detect_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.log(f"{title}...")
+        self.job = self.executor.submit(self.run_traced, task)
+        self.job_done = on_done
+        self.root.after(50, self.poll_job)
+
+    def run_traced(self, task):
+        # Worker thread
+        with trace.recording() as spans:
+            result = task(self.report_progress)
+        return result, spans
+
+    def report_progress(self, fraction):
+        # Called from the worker thread by the category modules
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        self.job_progress = fraction
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.cancel_event.set()
+            self.log("Cancelling...")
+
+    def on_close(self):
+        # Stop a running job at its next progress report instead of keeping
+        # the process alive until it finishes
+        self.cancel_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def poll_job(self):
+        self.progress_bar.set(self.job_progress)
+        if not self.job.done():
+            self.root.after(50, self.poll_job)
+            return
+        job, on_done = self.job, self.job_done
+        self.job = self.job_done = None
+        self.hide_btn.configure(state="normal")
+        self.extract_btn.configure(state="normal")
+        self.detect_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        try:
+            result, spans = job.result()
+        except OperationCancelled:
+            self.progress_bar.set(0)
+            self.log("Cancelled")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            self.log(f"Error: {e}")
+            return
+        self.progress_bar.set(1)
+        on_done(result)
+        if spans:
+            self.log(f"Timing: {trace.format_summary(spans)}")
+
     # ----------------- Operations -----------------
     def on_hide(self):
         cat = self.category_var.get()
-        method = self.method_var.get()
+        method = self.selected_method()
         msg = self.get_message_text()
-        if cat != "Video" and (not self.current_file or not os.path.exists(self.current_file)):
+        if not method.manual and (not self.current_file or not os.path.exists(self.current_file)):
             messagebox.showerror("Error", "Please select a file first")
             return
         if not msg:
             messagebox.showerror("Error", "Please enter a message to hide")
             return
-
         try:
-            out_name = None
-            if cat == "Image":
-                out_name = os.path.join(self.output_dir, "output_image.png")
-                if method == "LSB":
-                    image_stego.hide_lsb_image(self.current_file, msg, out_name)
-                elif method == "Parity":
-                    image_stego.hide_parity_image(self.current_file, msg, out_name)
-                elif method == "BitPlane":
-                    plane = max(0, min(7, int(self.plane_var.get()))) if self.plane_widget else 1
-                    image_stego.hide_bitplane_image(self.current_file, msg, out_name, plane=plane)
-
-            elif cat == "Audio":
-                out_name = os.path.join(self.output_dir, "output_audio.wav")
-                if method == "LSB":
-                    audio_stego.hide_audio_lsb(self.current_file, msg, out_name)
-                elif method == "Parity":
-                    audio_stego.hide_audio_parity(self.current_file, msg, out_name)
-                elif method == "Phase":
-                    audio_stego.hide_audio_phase(self.current_file, msg, out_name)
-                elif method == "Echo":
-                    delay = int(self.echo_delay_var.get()) if self.echo_widget else 120
-                    audio_stego.hide_audio_echo(self.current_file, msg, out_name, delay_samples=delay)
-
-            elif cat == "Text":
-                out_name = os.path.join(self.output_dir, "output_text.txt")
-                with open(self.current_file, "r", encoding="utf-8") as f:
-                    cover = f.read()
-                if method == "ZW":
-                    hidden = text_stego.hide_zw(cover, msg)
-                elif method == "Parity":
-                    hidden = text_stego.hide_parity_text(cover, msg)
-                else:
-                    hidden = text_stego.hide_whitespace(cover, msg)
-                with open(out_name, "w", encoding="utf-8") as f:
-                    f.write(hidden)
-
-            elif cat == "Video":
-                # Video uses DeEgger which is manual; we open DeEgger and create the message file
-                info = video_stego.hide_video_deegger(self.current_file, msg, lnk_path=DEEGGER_LNK_PATH)
+            params = self.method_params(method)
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid parameter: {e}")
+            return
+        carrier = self.current_file
+        ext = method.output_extension()
+        out_name = os.path.join(self.output_dir, f"output_{cat.lower()}{ext}") if ext else None
+
+        def task(progress):
+            # The registry picks the backend for the carrier; methods with
+            # reports_stats (the video frame pipeline) also fill in per-stage timing
+            stats = {}
+            extra = {"stats": stats} if method.reports_stats else {}
+            try:
+                result = method.hide(carrier, msg, out_name, progress=progress, **params, **extra)
+            except OperationCancelled:
+                # Streaming hides have already written part of the output
+                if out_name and os.path.exists(out_name):
+                    os.remove(out_name)
+                raise
+            return stats or result
+
+        def done(info):
+            if method.manual:
+                # DeEgger is manual; we open DeEgger and create the message file
                 self.log(f"DeEgger instructions:\nHost: {info['host']}\nEmbed file: {info['embed']}")
                 messagebox.showinfo("DeEgger", f"DeEgger opened. Embed file created at:\n{info['embed']}\nFollow instructions in the info panel.")
                 return
-
+            if method.reports_stats:
+                self.log(method.format_stats(info))
             self.log(f"Hidden message -> {out_name}")
             messagebox.showinfo("Success", f"Hidden message saved to:\n{out_name}")
-            # auto-open output folder
 
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.log(f"Error: {e}")
+        self.start_job(f"Hiding ({cat}/{method.name})", task, done)
 
     def on_extract(self):
         cat = self.category_var.get()
-        method = self.method_var.get()
+        method = self.selected_method()
 
-        # For extraction, audio/image/text need selected file; for video user picks extracted .txt
+        # For extraction the selected file is the carrier; for DeEgger the user picks the extracted .txt
+        if method.manual:
+            carrier = filedialog.askopenfilename(title="Select extracted .txt from DeEgger", filetypes=[("Text files", "*.txt")])
+            if not carrier:
+                return
+        elif not self.current_file:
+            messagebox.showerror("Error", f"Select {cat.lower()} file first")
+            return
+        else:
+            carrier = self.current_file
         try:
-            if cat == "Image":
-                if not self.current_file:
-                    messagebox.showerror("Error", "Select image file first")
-                    return
-                if method == "LSB":
-                    msg = image_stego.extract_lsb_image(self.current_file)
-                elif method == "Parity":
-                    msg = image_stego.extract_parity_image(self.current_file)
-                else:
-                    plane = max(0, min(7, int(self.plane_var.get()))) if self.plane_widget else 1
-                    msg = image_stego.extract_bitplane_image(self.current_file, plane=plane)
-                self.msg_text.delete("0.0", "end")
-                self.msg_text.insert("0.0", msg or "")
-
-            elif cat == "Audio":
-                if not self.current_file:
-                    messagebox.showerror("Error", "Select audio file first")
-                    return
-                if method == "LSB":
-                    msg = audio_stego.extract_audio_lsb(self.current_file)
-                elif method == "Parity":
-                    msg = audio_stego.extract_audio_parity(self.current_file)
-                elif method == "Phase":
-                    msg = audio_stego.extract_audio_phase(self.current_file)
-                else:
-                    delay = int(self.echo_delay_var.get()) if self.echo_widget else 120
-                    msg = audio_stego.extract_audio_echo(self.current_file, delay_samples=delay)
-                self.msg_text.delete("0.0", "end")
-                self.msg_text.insert("0.0", msg or "")
-
-            elif cat == "Text":
-                if not self.current_file:
-                    messagebox.showerror("Error", "Select text file first")
-                    return
-                with open(self.current_file, "r", encoding="utf-8") as f:
-                    cover = f.read()
-                if method == "ZW":
-                    msg = text_stego.extract_zw(cover)
-                elif method == "Parity":
-                    msg = text_stego.extract_parity_text(cover)
-                else:
-                    msg = text_stego.extract_whitespace(cover)
-                self.msg_text.delete("0.0", "end")
-                self.msg_text.insert("0.0", msg or "")
-
-            elif cat == "Video":
-                # For video extraction we ask user to select the extracted text file produced by DeEgger
-                extracted = filedialog.askopenfilename(title="Select extracted .txt from DeEgger", filetypes=[("Text files", "*.txt")])
-                if not extracted:
-                    return
-                msg = video_stego.extract_video_deegger(extracted)
-                self.msg_text.delete("0.0", "end")
-                self.msg_text.insert("0.0", msg or "")
+            params = self.method_params(method)
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid parameter: {e}")
+            return
+
+        def task(progress):
+            return method.extract(carrier, progress=progress, **params)
 
+        def done(msg):
+            self.msg_text.delete("0.0", "end")
+            self.msg_text.insert("0.0", msg or "")
             messagebox.showinfo("end", msg if msg else "[No message found]")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-            self.log(f"Error: {e}")
+
+        self.start_job(f"Extracting ({cat}/{method.name})", task, done)
+
+    def on_detect(self):
+        # Try every method/bit plane on the selected carrier in one pass
+        cat = self.category_var.get()
+        if cat not in registry.SCANNERS:
+            messagebox.showerror("Error", "Detect supports Image and Audio carriers")
+            return
+        if not self.current_file:
+            messagebox.showerror("Error", f"Select {cat.lower()} file first")
+            return
+        carrier = self.current_file
+
+        def task(progress):
+            return registry.scan(cat, carrier, progress=progress, max_length=registry.DETECT_MAX_LENGTH)
+
+        def done(results):
+            if not results:
+                self.log("Detect: no plausible message found")
+                messagebox.showinfo("Detect", "[No message found]")
+                return
+            for r in results:
+                where = r["method"] if r["plane"] is None else f"{r['method']} (plane {r['plane']})"
+                self.log(f"{where}: {r['length']} bytes, score {r['score']:.2f}: {r['message'][:60]!r}")
+            best = results[0]
+            self.msg_text.delete("0.0", "end")
+            self.msg_text.insert("0.0", best["message"])
+            messagebox.showinfo("Detect", f"Best match: {best['method']}" + ("" if best["plane"] is None else f" plane {best['plane']}"))
+
+        self.start_job(f"Detecting ({cat})", task, done)
 
 if __name__ == "__main__":
     root = ctk.CTk()
@@ -0,0 +1,184 @@
+# stego_batch.py
+# Headless batch API: run hide/extract jobs from a manifest across a process pool.
+import json
+import os
+import re
+import time
+
+from categories import registry, trace
+
+# Methods, their parameters, carrier formats and output extensions come from
+# categories.registry; manual methods (DeEgger) cannot run headless.
+def _method(job):
+    method = registry.get(job.get("category"), job.get("method"))
+    if method.manual:
+        raise ValueError(f"{method.category}/{method.name} is a manual method and cannot run in a batch")
+    return method
+
+def _params(method, job):
+    return {p.name: int(job[p.name]) for p in method.params if p.name in job}
+
+# ----------------- Manifest -----------------
+def load_manifest(path):
+    """Load jobs from a .jsonl, .json (list) or .csv manifest.
+
+    Each job has: carrier, method, and for hiding a message; optional
+    category (guessed from the extension), operation ("hide"/"extract"),
+    output, plane, delay_samples and k; image hides also take the PNG
+    compress_level and compress_type.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            import csv
+            jobs = [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(f)]
+        elif ext == ".json":
+            jobs = json.load(f)
+        else:
+            jobs = [json.loads(line) for line in f if line.strip()]
+    base = os.path.dirname(os.path.abspath(path))
+    for job in jobs:
+        for key in ("carrier", "output"):
+            if job.get(key) and not os.path.isabs(job[key]):
+                job[key] = os.path.join(base, job[key])
+    return jobs
+
+def normalize_job(job, output_dir=None, index=None):
+    """Fill in a job's defaults; index is its position in the batch.
+
+    A hide job without output gets one next to its carrier (or in
+    output_dir) named after the carrier, method and index, so several hides
+    of one carrier in a batch do not overwrite each other.
+    """
+    job = dict(job)
+    if not job.get("carrier"):
+        raise ValueError("Job has no carrier")
+    ext = os.path.splitext(job["carrier"])[1].lower()
+    job.setdefault("category", registry.guess_category(job["carrier"]))
+    job.setdefault("operation", "hide")
+    method = _method(job)
+    if job["operation"] not in ("hide", "extract"):
+        raise ValueError(f"Unknown operation {job['operation']}")
+    if job["operation"] == "hide":
+        if "message" not in job:
+            raise ValueError("Hide job has no message")
+        if not job.get("output"):
+            # Lossless output (JPEG carriers are written as PNG)
+            stem = os.path.splitext(os.path.basename(job["carrier"]))[0]
+            out_ext = method.output_extension() or ext
+            folder = output_dir or os.path.dirname(job["carrier"])
+            tag = re.sub(r"[^0-9a-z]+", "-", method.name.lower()).strip("-")
+            if index is not None:
+                tag = f"{index}_{tag}"
+            job["output"] = os.path.join(folder, f"{stem}_stego_{tag}{out_ext}")
+    return job
+
+def check_capacity(job):
+    """Raise ValueError if a normalized hide job's message cannot fit its carrier.
+
+    Uses the method's capacity(), which only reads headers (or counts
+    text), so oversized jobs are rejected before any decoding.
+    """
+    method = _method(job)
+    available = method.capacity(job["carrier"], **_params(method, job))
+    needed = len(job["message"].encode("utf-8"))
+    if needed > available:
+        raise ValueError(f"Message too large for carrier ({needed} > capacity {available})")
+
+# ----------------- Execution -----------------
+def run_job(job, traced=False):
+    """Run a single normalized job; never raises, the outcome is in the returned dict.
+
+    With traced, the job's trace spans are returned under "trace".
+    """
+    if traced:
+        with trace.recording() as spans:
+            with trace.span("job", category=job.get("category"), method=job.get("method"),
+                            operation=job.get("operation"), carrier=job.get("carrier")):
+                result = run_job(job)
+        result["trace"] = spans
+        return result
+    start = time.perf_counter()
+    result = {"carrier": job.get("carrier"), "operation": job.get("operation"), "ok": False}
+    try:
+        method = _method(job)
+        kwargs = _params(method, job)
+        if job["operation"] == "hide":
+            if job["category"] == "Image":
+                # PNG output settings, see image_stego.save_options
+                kwargs.update({k: int(job[k]) for k in ("compress_level", "compress_type") if k in job})
+            method.hide(job["carrier"], job["message"], job["output"], **kwargs)
+            result["output"] = job["output"]
+        else:
+            result["message"] = method.extract(job["carrier"], **kwargs)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def run_batch(jobs, workers=None, output_dir=None, progress=None, precheck=True, trace_path=None):
+    """Run jobs across a process pool.
+
+    With precheck, hide jobs whose message exceeds the carrier capacity fail
+    up front instead of being sent to a worker. A hide job whose output is
+    already written by an earlier job fails up front too, since the two
+    workers would overwrite each other. progress(done, total, result)
+    is called in the parent for every finished job. With trace_path, every
+    worker records its stage spans and they are saved there as one Chrome
+    trace (pid/tid are the worker process and thread). Returns a summary
+    dict with the per-job results (in manifest order), ok/failed counts,
+    wall time and throughput in files/second.
+    """
+    # Imported here: worker processes import this module to run jobs, and
+    # they never need the pool machinery themselves
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    start = time.perf_counter()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    results = [None] * len(jobs)
+    pending = {}
+    done = 0
+    trace_events = []
+    outputs = {}
+    for i, job in enumerate(jobs):
+        try:
+            pending[i] = normalize_job(job, output_dir, i)
+            if pending[i]["operation"] == "hide":
+                key = os.path.normcase(os.path.abspath(pending[i]["output"]))
+                if key in outputs:
+                    raise ValueError(f"Output {pending[i]['output']} is also written by job {outputs[key]}")
+                outputs[key] = i
+            if precheck and pending[i]["operation"] == "hide":
+                check_capacity(pending[i])
+        except Exception as e:
+            pending.pop(i, None)
+            results[i] = {"index": i, "carrier": job.get("carrier"), "operation": job.get("operation"),
+                          "ok": False, "error": f"{type(e).__name__}: {e}", "seconds": 0.0}
+            done += 1
+            if progress:
+                progress(done, len(jobs), results[i])
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, trace_path is not None): i for i, job in pending.items()}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            results[i]["index"] = i
+            if "trace" in results[i]:
+                trace_events += trace.chrome_trace(results[i].pop("trace"), {"job": i})
+            done += 1
+            if progress:
+                progress(done, len(jobs), results[i])
+
+    if trace_path:
+        trace.write_chrome_trace(trace_path, trace_events)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for r in results if r["ok"])
+    return {
+        "results": results,
+        "ok": ok,
+        "failed": len(results) - ok,
+        "seconds": elapsed,
+        "files_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
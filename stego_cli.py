@@ -0,0 +1,108 @@
+# stego_cli.py
+# Headless command line entry point (never imports the GUI).
+import argparse
+import io
+import json
+import os
+import sys
+
+TEXT_METHODS = {
+    "zw": ("hide_zw_stream", "extract_zw_stream"),
+    "parity": ("hide_parity_text_stream", "extract_parity_text_stream"),
+    "whitespace": ("hide_whitespace_stream", "extract_whitespace_stream"),
+}
+
+def _open_text(path, mode):
+    # "-" means stdin/stdout, always read and written as UTF-8. newline=""
+    # passes line endings through untranslated, so everything but the marks
+    # comes out byte for byte (CRLF stays CRLF, also on Windows)
+    if path == "-":
+        stream = sys.stdin if "r" in mode else sys.stdout
+        return io.TextIOWrapper(stream.buffer, encoding="utf-8", newline="", write_through=True)
+    return open(path, mode, encoding="utf-8", newline="")
+
+def cmd_batch(args):
+    import stego_batch
+    jobs = stego_batch.load_manifest(args.manifest)
+
+    def progress(done, total, result):
+        status = "ok" if result["ok"] else "FAILED"
+        detail = result.get("output") or result.get("error") or repr(result.get("message", ""))
+        print(f"[{done}/{total}] {status} {result['carrier']}: {detail}", file=sys.stderr)
+
+    summary = stego_batch.run_batch(jobs, workers=args.workers, output_dir=args.output_dir,
+                                    progress=None if args.quiet else progress, precheck=not args.no_precheck,
+                                    trace_path=args.trace)
+    print(f"{summary['ok']} ok, {summary['failed']} failed in {summary['seconds']:.2f} s "
+          f"({summary['files_per_second']:.1f} files/s)", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary["failed"] == 0 else 1
+
+def cmd_text_hide(args):
+    import categories.text_stego as text_stego
+    if args.message_file:
+        with open(args.message_file, "r", encoding="utf-8") as f:
+            message = f.read()
+    else:
+        message = args.message
+    hide = getattr(text_stego, TEXT_METHODS[args.method][0])
+    with _open_text(args.input, "r") as reader:
+        try:
+            with _open_text(args.output, "w") as writer:
+                hide(reader, writer, message)
+        except ValueError as e:
+            # Cover too short (or not UTF-8): the output holds only part of it
+            if args.output != "-" and os.path.exists(args.output):
+                os.remove(args.output)
+            print(f"text-hide: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+def cmd_text_extract(args):
+    import categories.text_stego as text_stego
+    extract = getattr(text_stego, TEXT_METHODS[args.method][1])
+    with _open_text(args.input, "r") as reader:
+        message = extract(reader)
+    with _open_text(args.output, "w") as writer:
+        writer.write(message)
+    return 0 if message else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="stego_cli", description="Headless steganography tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    batch = sub.add_parser("batch", help="Run hide/extract jobs from a manifest (.jsonl/.json/.csv)")
+    batch.add_argument("manifest")
+    batch.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    batch.add_argument("-o", "--output-dir", default=None, help="Folder for outputs not named in the manifest")
+    batch.add_argument("--report", default=None, help="Write the JSON summary here")
+    batch.add_argument("-q", "--quiet", action="store_true", help="No per-item progress")
+    batch.add_argument("--no-precheck", action="store_true", help="Skip the capacity check before submitting jobs")
+    batch.add_argument("--trace", default=None, metavar="TRACE_JSON",
+                       help="Record per-stage timings and save them as Chrome trace JSON")
+    batch.set_defaults(func=cmd_batch)
+
+    text_hide = sub.add_parser("text-hide", help="Stream a text cover (stdin by default) into stego text (stdout)")
+    text_hide.add_argument("-m", "--method", choices=sorted(TEXT_METHODS), default="zw")
+    group = text_hide.add_mutually_exclusive_group(required=True)
+    group.add_argument("--message")
+    group.add_argument("--message-file")
+    text_hide.add_argument("-i", "--input", default="-")
+    text_hide.add_argument("-o", "--output", default="-")
+    text_hide.set_defaults(func=cmd_text_hide)
+
+    text_extract = sub.add_parser("text-extract", help="Extract a message from stego text (stdin by default)")
+    text_extract.add_argument("-m", "--method", choices=sorted(TEXT_METHODS), default="zw")
+    text_extract.add_argument("-i", "--input", default="-")
+    text_extract.add_argument("-o", "--output", default="-")
+    text_extract.set_defaults(func=cmd_text_extract)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())